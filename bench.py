@@ -0,0 +1,242 @@
+# Benchmarks for the data model, run without a display:
+#
+#   python bench.py generate 100000 applications.json
+#   python bench.py run --sizes 1000 10000 100000 --output results.json
+#
+# `run` writes one JSON document with a row per (size, operation) so results from
+# two versions can be diffed or loaded into a spreadsheet.
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from model import (IMPORT_FIELDS, SORT_OPTIONS, STATUSES, build_application, export_applications,
+                   import_applications, open_repository)
+
+COMPANIES = [
+    "Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises",
+    "Wonka", "Cyberdyne", "Soylent", "Tyrell", "Aperture Science", "Black Mesa", "Vandelay",
+    "Pied Piper", "Massive Dynamic", "Oscorp", "Gringotts", "Monsters Inc", "Dunder Mifflin",
+]
+SENIORITIES = ["Junior", "", "", "Senior", "Staff", "Lead", "Principal"]
+ROLES = [
+    "Software Engineer", "Backend Developer", "Frontend Developer", "Data Scientist",
+    "DevOps Engineer", "Product Manager", "QA Engineer", "Data Engineer", "Mobile Developer",
+    "Site Reliability Engineer", "Machine Learning Engineer", "Security Engineer",
+]
+STATUS_WEIGHTS = [10, 40, 10, 12, 3, 20, 2, 3] # How often each of STATUSES occurs
+WORDS = (
+    "we are looking for an experienced engineer to join our team you will design build and "
+    "maintain scalable services work closely with product and design own features end to end "
+    "python java go rust typescript react django flask postgres redis kafka kubernetes docker "
+    "aws gcp azure terraform ci cd testing code review mentoring agile remote hybrid onsite "
+    "benefits salary equity pension health insurance flexible hours learning budget growth "
+    "requirements years of experience degree in computer science or equivalent strong "
+    "communication skills ownership curiosity collaboration distributed systems api design"
+).split()
+# Searches at increasing query lengths, as typed into the search box
+SEARCH_QUERIES = ["a", "py", "eng", "acme", "remote", "kubernetes", "senior software engineer"]
+OPERATION_COUNT = 200 # add/edit/delete operations timed per size
+
+
+def generate_applications(count, seed=0):
+    # `count` applications spread over the last three years, in the applications.json format
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=3 * 365)
+    apps = []
+    for app_id in range(1, count + 1):
+        dt_obj = (start + timedelta(days=rng.randrange(3 * 365))).replace(hour=0, minute=0, second=0, microsecond=0)
+        app = build_application(
+            dt_obj.strftime("%d/%m/%Y"),
+            rng.choice(COMPANIES),
+            " ".join(filter(None, [rng.choice(SENIORITIES), rng.choice(ROLES)])),
+            " ".join(rng.choices(WORDS, k=rng.randint(40, 400))),
+            rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+        )
+        app["id"] = app_id
+        apps.append(app)
+    return apps
+
+
+def write_applications(apps, path):
+    with open(path, "w") as f:
+        json.dump(apps, f)
+
+
+def timed(func, repeat=1):
+    # (min, median) wall time of `repeat` calls, in seconds
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def consume(result):
+    # What the GUI reads of a result: every row of a list, the first page of a paged result
+    if isinstance(result, list):
+        return len(result)
+    return len(result) and result[0]["id"]
+
+
+class Bench:
+    def __init__(self, storage, repeat):
+        self.storage = storage
+        self.repeat = repeat
+        self.rows = []
+
+    def record(self, size, operation, times, count=1):
+        best, median = times
+        self.rows.append({
+            "size": size,
+            "operation": operation,
+            "count": count, # Operations per timed call; per_op_s divides by it
+            "min_s": round(best, 6),
+            "median_s": round(median, 6),
+            "per_op_s": round(median / count, 9),
+        })
+        print(f"{size:>9} {operation:<32} {median:10.4f}s", file=sys.stderr)
+
+    def run_size(self, size, workdir):
+        data_file = os.path.join(workdir, "applications.json")
+        write_applications(generate_applications(size), data_file)
+
+        # The first load imports the plain JSON (descriptions inline, or into SQLite)
+        repo = open_repository(self.storage, data_file)
+        self.record(size, "load_initial", timed(repo.load))
+        repo.close()
+
+        if os.path.exists(data_file + ".cache"):
+            repo = open_repository(self.storage, data_file)
+            os.remove(data_file + ".cache") # Parse the JSON; the cache is rebuilt by this load
+            self.record(size, "load_uncached", timed(repo.load))
+            repo.close()
+
+        repo = open_repository(self.storage, data_file)
+        self.record(size, "load", timed(repo.load))
+
+        def save():
+            repo.save()
+            repo.flush()
+        self.record(size, "save", timed(save, self.repeat))
+
+        for option in SORT_OPTIONS:
+            self.record(size, f"sort:{option}", timed(lambda: consume(repo.query("", option)), self.repeat))
+
+        # Until its search index is built (in the background, in the GUI) the JSON backend
+        # scans; the search:* rows after the build show what the index saves over these
+        for text in SEARCH_QUERIES:
+            self.record(size, f"search_scan:{len(text)}:{text}", timed(lambda: consume(repo.query(text))))
+        self.record(size, "search_index", timed(lambda: [*repo.build_search_index()]))
+        for text in SEARCH_QUERIES:
+            self.record(size, f"search:{len(text)}:{text}", timed(lambda: consume(repo.query(text)), self.repeat))
+
+        rng = random.Random(size)
+        new_apps = generate_applications(OPERATION_COUNT, seed=size)
+        added = []
+
+        def add():
+            for app in new_apps:
+                del app["id"]
+                added.append(repo.add(app)["id"])
+            repo.flush()
+        self.record(size, "add", timed(add), OPERATION_COUNT)
+
+        def edit():
+            for app_id in rng.sample(added, len(added)):
+                repo.update(app_id, build_application("01/01/2024", rng.choice(COMPANIES), rng.choice(ROLES),
+                                                      " ".join(rng.choices(WORDS, k=100)), rng.choice(STATUSES)))
+            repo.flush()
+        self.record(size, "edit", timed(edit), OPERATION_COUNT)
+
+        def delete():
+            for app_id in added:
+                repo.remove([app_id])
+            repo.flush()
+        self.record(size, "delete", timed(delete), OPERATION_COUNT)
+        repo.close()
+
+        # Bulk import of `size` JSON Lines rows into an empty repository, then export them
+        import_file = os.path.join(workdir, "import.jsonl")
+        with open(import_file, "w") as f:
+            for app in generate_applications(size, seed=size + 1):
+                f.write(json.dumps({field: app[field] for field in IMPORT_FIELDS}) + "\n")
+        repo = open_repository(self.storage, os.path.join(workdir, "imported.json"))
+        repo.load()
+
+        def bulk_import():
+            for _ in import_applications(repo, import_file):
+                pass
+            repo.flush()
+        self.record(size, "import", timed(bulk_import), size)
+
+        def bulk_export():
+            for _ in export_applications(repo, os.path.join(workdir, "export.csv")):
+                pass
+        self.record(size, "export", timed(bulk_export), size)
+        repo.close()
+
+    def run(self, sizes):
+        for size in sizes:
+            workdir = tempfile.mkdtemp(prefix="bench-")
+            try:
+                self.run_size(size, workdir)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the job application data model.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="write a synthetic applications.json")
+    generate.add_argument("count", type=int)
+    generate.add_argument("path")
+    generate.add_argument("--seed", type=int, default=0)
+    run = commands.add_parser("run", help="time load, save, sort, search, edits, import and export")
+    run.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                     help="dataset sizes to benchmark (1000000 takes several minutes)")
+    run.add_argument("--storage", choices=["json", "sqlite"], default="json")
+    run.add_argument("--repeat", type=int, default=3, help="runs per read-only measurement")
+    run.add_argument("--output", help="write results here instead of stdout")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        write_applications(generate_applications(args.count, args.seed), args.path)
+        return
+
+    bench = Bench(args.storage, args.repeat)
+    bench.run(args.sizes)
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "storage": args.storage,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "results": bench.rows,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,79 @@
 import json
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from datetime import datetime
+from itertools import islice
+import argparse
+import csv
 import os
+import sys
+import threading
+import time
+
+from model import (SORT_OPTIONS, STATUSES, Metrics, PagedResult, bisect_ordered, build_application,
+                   export_applications, import_applications, open_repository, parse_date_range)
+
+DATA_FILE = "applications.json"
+TRANSFER_FILETYPES = [("CSV or JSON Lines", "*.csv *.jsonl"), ("All files", "*.*")]
+
 
 class JobApplicationManager:
-    def __init__(self, root):
+    SEARCH_DEBOUNCE_MS = 150 # Wait this long after the last keystroke before searching
+    SEARCH_CHUNK_SIZE = 5000 # Records checked per event-loop slice, so newer keystrokes get through
+    VIRTUAL_THRESHOLD = 2000 # Result sets larger than this are shown with virtual scrolling
+    VIRTUAL_BUFFER_ROWS = 5 # Extra rows rendered below the visible window
+    TREE_ROW_HEIGHT = 25 # Must match the Treeview rowheight in setup_style
+    TREE_HEADING_HEIGHT = 25
+    RENUMBER_CHUNK_SIZE = 500 # Rows renumbered per event-loop slice after an insert/delete
+    SEARCH_INDEX_CHUNK_SIZE = 200 # Records added to the search index per event-loop slice
+    LOAD_POLL_MS = 50 # How often to check whether background loading has finished
+    WRITE_ERROR_POLL_MS = 500 # How often to check the background writer for failed saves
+    METRICS_POLL_MS = 250 # How often the performance overlay is refreshed
+    WATCH_POLL_MS = 1000 # How often the data file is checked for changes by other instances
+    REFRESH_CHANGED_LIMIT = 500 # Changed records beyond which the view is rebuilt instead of patched
+    IMPORT_MESSAGES_SHOWN = 10 # Rejected rows listed in the import summary
+    # Repository methods timed when instrumentation is on. The record lookups run for every
+    # row shown, so they are kept out of the overlay, which shows the last user-facing one.
+    TIMED_REPO_METHODS = ("load", "save", "query", "add", "update", "remove")
+    TIMED_REPO_LOOKUPS = ("get", "description")
+
+    def __init__(self, root, storage="json", metrics=None, metrics_output=None):
         self.root = root
         self.root.title("Job Application Manager")
         self.root.geometry("1200x700") # Increased window size for better layout
         self.root.configure(bg="#1e1e1e")
 
-        self.data_file = "applications.json"
-        self.applications = []
-        self.selected_item_id = None # To store the IID of the selected item in Treeview
+        self.data_file = DATA_FILE
+        self.repo = open_repository(storage, self.data_file, background=True)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics_output = metrics_output # File the latency summary is written to on exit
+        self.metrics.wrap(self.repo, self.TIMED_REPO_METHODS, prefix="repo.")
+        self.metrics.wrap(self.repo, self.TIMED_REPO_LOOKUPS, prefix="repo.", overlay=False)
+        if self.repo.writer is not None:
+            self.metrics.wrap(self.repo.writer, ["handler"], prefix="writer.", overlay=False)
+        self.selected_app_id = None # Unique ID of the application loaded into the form
+        self.view_ids = [] # IDs of the filtered/sorted applications, in display order
+        self.virtual_mode = False
+        self.virtual_top = 0 # Index in view_ids of the first rendered row
+        self.selected_ids = {} # Selected app IDs in virtual mode (insertion ordered)
+        self.expected_tree_selection = set() # Row selection last set by render_virtual_window
+        self.sorted_by = None # Sort option the view is currently ordered by
+        self.search_after_id = None # Pending debounced search
+        self.search_generation = 0 # Bumped on every new search so stale ones stop
+        self.last_query = None # Lowercased query that view_ids currently reflects
+        self.last_range = (None, None) # Date range (timestamps) that view_ids currently reflects
+        self.renumber_from = None # First view position whose "ID" column is out of date
+        self.renumber_after_id = None
+        self.search_started = None # perf_counter() when the running search began, None if none is
+        self.loading = False # Loading, importing or exporting; the data file watcher waits
+        self.stats_window = None # Open statistics window, refreshed after every change
+        self.stats_trees = {}
 
         self.setup_style()
-        self.load_data()
         self.create_widgets()
         self.sort_applications() # Initial sort
-        self.update_treeview()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.load_data() # Runs in the background; the tree is filled in once it is done
 
     def setup_style(self):
         style = ttk.Style(self.root)
@@ -40,31 +94,112 @@ class JobApplicationManager:
 
 
     def load_data(self):
-        if os.path.exists(self.data_file):
+        # Read the data off the Tk thread so the window shows up right away
+        self.set_loading(True)
+        self.load_error = None
+        self.load_thread = threading.Thread(target=self.load_in_background, name="loader", daemon=True)
+        self.load_thread.start()
+        self.root.after(self.LOAD_POLL_MS, self.check_loading)
+
+    def load_in_background(self):
+        try:
+            self.repo.load()
+        except Exception as e: # Reported on the Tk thread by check_loading
+            self.load_error = e
+
+    def check_loading(self):
+        if self.load_thread.is_alive():
+            self.root.after(self.LOAD_POLL_MS, self.check_loading)
+            return
+        if isinstance(self.load_error, json.JSONDecodeError):
+            messagebox.showerror("Load Error", f"Error decoding JSON from {self.data_file}. Starting with an empty list.")
+            self.repo.load(snapshot_ok=False)
+        elif self.load_error is not None:
+            messagebox.showerror("Load Error", f"Could not load applications: {self.load_error}")
+            self.repo.close()
+            self.root.destroy()
+            return
+        self.set_loading(False)
+        self.update_treeview(self.search_var.get())
+        self.root.after(1, self.build_search_index, self.repo.build_search_index(self.SEARCH_INDEX_CHUNK_SIZE))
+        self.root.after(self.WRITE_ERROR_POLL_MS, self.check_write_errors)
+        self.root.after(self.WATCH_POLL_MS, self.watch_data_file)
+        if self.metrics.enabled:
+            self.update_metrics_overlay()
+
+    def build_search_index(self, steps):
+        # Indexing every description takes seconds on large files, so it runs a chunk per
+        # event-loop slice; searches scan the records until it is done
+        if next(steps, None) is not None:
+            self.root.after(1, self.build_search_index, steps)
+
+    def set_loading(self, loading, text="Loading applications..."):
+        # Editing is disabled and a progress bar shown while applications are loading,
+        # imported or exported
+        for widget in (self.submit_btn, self.delete_btn, self.stats_btn, self.import_btn, self.export_btn,
+                       self.search_entry, self.search_btn, self.sort_combo, self.date_from_entry, self.date_to_entry):
+            widget.state(["disabled"] if loading else ["!disabled"])
+        self.loading = loading
+        self.loading_label.config(text=text)
+        if loading:
+            self.loading_label.pack(side=tk.LEFT, padx=(10,5))
+            self.loading_bar.pack(side=tk.LEFT, padx=5)
+            self.loading_bar.start(10)
+        else:
+            self.loading_bar.stop()
+            self.loading_bar.pack_forget()
+            self.loading_label.pack_forget()
+
+    def check_write_errors(self):
+        writer = self.repo.writer
+        if writer is not None:
+            while not writer.errors.empty():
+                messagebox.showerror("Save Error", f"Could not save applications: {writer.errors.get_nowait()}")
+        self.root.after(self.WRITE_ERROR_POLL_MS, self.check_write_errors)
+
+    def watch_data_file(self):
+        # Merges what other instances saved, then patches only the affected rows. Not
+        # while a search is running, as it reads the indexes a merge would change.
+        if not self.loading and self.search_started is None and self.repo.check_external_changes():
+            with self.metrics.measure("external_changes"):
+                if self.selected_app_id is not None and self.repo.get(self.selected_app_id) is None:
+                    self.clear_form() # Removed by the other instance
+                self.refresh_changed({}, [])
+                self.refresh_statistics()
+        self.root.after(self.WATCH_POLL_MS, self.watch_data_file)
+
+    def update_metrics_overlay(self):
+        last = self.metrics.last
+        if last is not None:
+            name, seconds, rows = last
+            text = f"{name}: {seconds * 1000:.1f} ms"
+            if rows is not None:
+                text += f", {rows} rows"
+            self.metrics_label.config(text=text)
+        self.root.after(self.METRICS_POLL_MS, self.update_metrics_overlay)
+
+    def on_close(self):
+        if self.load_thread.is_alive():
+            self.load_thread.join() # Loading can't be interrupted safely
+        self.repo.close() # Waits for queued writes to reach the disk
+        if self.metrics_output:
             try:
-                with open(self.data_file, 'r') as f:
-                    self.applications = json.load(f)
-            except json.JSONDecodeError:
-                messagebox.showerror("Load Error", f"Error decoding JSON from {self.data_file}. Starting with an empty list.")
-                self.applications = []
-        # Ensure all applications have a unique ID, if not present (for backward compatibility)
-        for i, app in enumerate(self.applications):
-            if "id" not in app:
-                app["id"] = i # Simple sequential ID for older data, can be improved
-            if "timestamp" not in app: # Add timestamp if missing for sorting
-                try:
-                    # Attempt to parse date, default to now if invalid
-                    dt_obj = datetime.strptime(app["date"], "%d/%m/%Y")
-                except ValueError:
-                    dt_obj = datetime.now()
-                app["timestamp"] = dt_obj.timestamp()
+                self.metrics.dump(self.metrics_output)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not write performance data to {self.metrics_output}: {e}")
+        self.root.destroy()
 
 
     def save_data(self):
-        with open(self.data_file, 'w') as f:
-            json.dump(self.applications, f, indent=2)
+        self.repo.save()
 
     def create_widgets(self):
+        # Latency of the last measured operation, shown only with instrumentation on.
+        # Packed first so the main frame can't squeeze it out.
+        if self.metrics.enabled:
+            self.metrics_label = ttk.Label(self.root, text="", anchor="w")
+            self.metrics_label.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0,5))
+
         # Main frame
         main_frame = ttk.Frame(self.root)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -101,7 +236,7 @@ class JobApplicationManager:
         ttk.Label(form_frame, text="Application Status:").grid(row=4, column=0, padx=5, pady=5, sticky="w")
         self.status_var = tk.StringVar(value="pending")
         self.status_combo = ttk.Combobox(form_frame, textvariable=self.status_var,
-                                         values=["pending", "submitted", "assessment", "interview", "offer", "rejected", "accepted", "withdrawn"], width=entry_width -2, state="readonly")
+                                         values=list(STATUSES), width=entry_width -2, state="readonly")
         self.status_combo.grid(row=4, column=1, padx=5, pady=5, sticky="ew")
 
         self.submit_btn = ttk.Button(form_frame, text="Add Application", command=self.add_or_edit_application)
@@ -120,11 +255,20 @@ class JobApplicationManager:
         self.search_entry.pack(side=tk.LEFT, padx=(0,5))
         self.search_entry.bind("<KeyRelease>", self.filter_applications_event)
 
-        search_btn = ttk.Button(controls_frame, text="Search", command=self.filter_applications_event)
-        search_btn.pack(side=tk.LEFT, padx=5)
+        self.search_btn = ttk.Button(controls_frame, text="Search", command=self.filter_applications_event)
+        self.search_btn.pack(side=tk.LEFT, padx=5)
 
-        delete_btn = ttk.Button(controls_frame, text="Remove Selected", command=self.remove_selected)
-        delete_btn.pack(side=tk.LEFT, padx=5)
+        self.delete_btn = ttk.Button(controls_frame, text="Remove Selected", command=self.remove_selected)
+        self.delete_btn.pack(side=tk.LEFT, padx=5)
+
+        self.stats_btn = ttk.Button(controls_frame, text="Statistics", command=self.show_statistics)
+        self.stats_btn.pack(side=tk.LEFT, padx=5)
+
+        self.import_btn = ttk.Button(controls_frame, text="Import...", command=self.import_file)
+        self.import_btn.pack(side=tk.LEFT, padx=5)
+
+        self.export_btn = ttk.Button(controls_frame, text="Export...", command=self.export_file)
+        self.export_btn.pack(side=tk.LEFT, padx=5)
 
         ttk.Label(controls_frame, text="Sort by:").pack(side=tk.LEFT, padx=(10,5))
         self.sort_var = tk.StringVar(value="New to Old")
@@ -134,6 +278,22 @@ class JobApplicationManager:
         self.sort_combo.pack(side=tk.LEFT, padx=5)
         self.sort_combo.bind("<<ComboboxSelected>>", self.sort_and_refresh_treeview)
 
+        # Optional date range, inclusive, in the same format as the form
+        ttk.Label(controls_frame, text="From:").pack(side=tk.LEFT, padx=(10,5))
+        self.date_from_var = tk.StringVar()
+        self.date_from_entry = ttk.Entry(controls_frame, textvariable=self.date_from_var, width=11)
+        self.date_from_entry.pack(side=tk.LEFT)
+        self.date_from_entry.bind("<KeyRelease>", self.filter_applications_event)
+        ttk.Label(controls_frame, text="To:").pack(side=tk.LEFT, padx=(10,5))
+        self.date_to_var = tk.StringVar()
+        self.date_to_entry = ttk.Entry(controls_frame, textvariable=self.date_to_var, width=11)
+        self.date_to_entry.pack(side=tk.LEFT)
+        self.date_to_entry.bind("<KeyRelease>", self.filter_applications_event)
+
+        # Shown by set_loading while applications are read in the background
+        self.loading_label = ttk.Label(controls_frame, text="Loading applications...")
+        self.loading_bar = ttk.Progressbar(controls_frame, mode="indeterminate", length=100)
+
 
         self.tree = ttk.Treeview(tree_controls_frame, columns=("index", "date", "company", "job", "desc_action", "status"), show="headings")
         self.tree.heading("index", text="ID")
@@ -150,10 +310,23 @@ class JobApplicationManager:
         self.tree.column("desc_action", width=100, anchor="center") # For "View" button
         self.tree.column("status", width=100, anchor="w")
 
+        # The scrollbar drives the tree directly, or the virtual window in virtual mode
+        self.tree_scrollbar = ttk.Scrollbar(tree_controls_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.tree.configure(yscrollcommand=self.on_tree_yscroll)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
         self.tree.pack(pady=10, fill=tk.BOTH, expand=True)
 
         self.tree.bind("<<TreeviewSelect>>", self.load_selected_to_form)
         self.tree.bind("<Double-1>", self.handle_tree_double_click)
+        self.tree.bind("<Button-1>", self.on_tree_click)
+        self.tree.bind("<Configure>", self.on_tree_resize)
+        self.tree.bind("<MouseWheel>", self.on_tree_mousewheel)
+        self.tree.bind("<Button-4>", self.on_tree_mousewheel) # X11 wheel up
+        self.tree.bind("<Button-5>", self.on_tree_mousewheel) # X11 wheel down
+        self.tree.bind("<Up>", lambda event: self.on_tree_arrow(-1))
+        self.tree.bind("<Down>", lambda event: self.on_tree_arrow(1))
+        self.tree.bind("<Prior>", lambda event: self.on_tree_page(-1))
+        self.tree.bind("<Next>", lambda event: self.on_tree_page(1))
 
 
     def handle_tree_double_click(self, event):
@@ -166,51 +339,13 @@ class JobApplicationManager:
         # Check if the click was on the "Description" column (now "desc_action")
         # The column index is #<col_num>, e.g., #5 for the 5th column (1-based)
         if column_id == "#5": # Column for description action
-            item_values = self.tree.item(item_id, "values")
-            # The actual description is not directly in values, retrieve from self.applications
-            app_id = item_values[0] # Assuming index is the app_id shown in tree
-            
-            # Find the application by the ID displayed in the tree.
-            # The 'app_id' in tree is the visual index + 1.
-            # We need to find the original application based on a unique identifier if possible.
-            # For now, let's assume the app_id from the tree helps find it if the list is static
-            # Or better, store the original app's unique_id in the tree item itself.
-
-            # Let's retrieve the original application by its unique ID
-            # When inserting into treeview, we should store the app['id']
-            original_app = None
-            for app in self.applications:
-                # Assuming the visual index in the tree can map back if we store the app['id']
-                # For simplicity, if tree shows '1', it means index 0 of *currently displayed* items
-                # This is tricky if the tree is filtered/sorted differently than self.applications
-                # The best way is to store the unique app['id'] when inserting items.
-                # We get the app_id from the tree's 'values'
-                if self.tree.item(item_id, 'tags') and len(self.tree.item(item_id, 'tags')) > 0:
-                    unique_app_id = self.tree.item(item_id, 'tags')[0]
-                    if str(app.get("id")) == str(unique_app_id):
-                        original_app = app
-                        break
-            
+            # The unique app id is stored as the item's tag when inserting into the tree
+            tags = self.tree.item(item_id, 'tags')
+            original_app = self.repo.get(tags[0]) if tags else None
             if original_app:
-                self.show_description_popup(original_app["description"])
+                self.show_description_popup(self.repo.description(original_app))
             else:
-                # Fallback if direct ID mapping fails (e.g. if tags not used properly)
-                # This is less reliable if the tree order doesn't match self.applications order
-                try:
-                    # If 'app_id' is the visual index (1-based)
-                    actual_index_in_current_view = int(app_id) -1
-                    # Get the IID of the item at that visual index
-                    all_items_in_tree = self.tree.get_children('')
-                    if 0 <= actual_index_in_current_view < len(all_items_in_tree):
-                        target_iid = all_items_in_tree[actual_index_in_current_view]
-                        if self.tree.item(target_iid, 'tags') and len(self.tree.item(target_iid, 'tags')) > 0:
-                             unique_app_id_fallback = self.tree.item(target_iid, 'tags')[0]
-                             for app_fallback in self.applications:
-                                 if str(app_fallback.get("id")) == str(unique_app_id_fallback):
-                                     self.show_description_popup(app_fallback["description"])
-                                     return
-                except (ValueError, IndexError):
-                    messagebox.showinfo("Info", "Could not retrieve description for this item using visual index.")
+                messagebox.showinfo("Info", "Could not retrieve description for this item.")
 
 
     def show_description_popup(self, description_text):
@@ -234,17 +369,137 @@ class JobApplicationManager:
         popup.grab_set() # Modal behavior
         self.root.wait_window(popup) # Wait for popup to close
 
+    def show_statistics(self):
+        # Not modal, so it can stay open and follow edits
+        if self.stats_window is not None:
+            self.stats_window.lift()
+            return
+        window = self.stats_window = tk.Toplevel(self.root)
+        window.title("Statistics")
+        window.geometry("760x640")
+        window.configure(bg="#1e1e1e")
+        window.protocol("WM_DELETE_WINDOW", self.close_statistics)
+
+        content_frame = ttk.Frame(window, padding=10)
+        content_frame.pack(expand=True, fill=tk.BOTH)
+        self.stats_trees = {
+            "stages": self.create_stats_tree(content_frame, "Pipeline", [
+                ("Status", 110), ("Now", 60), ("Ever", 60), ("Avg days in stage", 130), ("Avg days so far", 130)]),
+        }
+        periods_frame = ttk.Frame(content_frame)
+        periods_frame.pack(fill=tk.BOTH, expand=True)
+        self.stats_trees["months"] = self.create_stats_tree(periods_frame, "Applications per month",
+                                                            [("Month", 100), ("Applications", 100)], side=tk.LEFT)
+        self.stats_trees["weeks"] = self.create_stats_tree(periods_frame, "Applications per week",
+                                                           [("Week", 100), ("Applications", 100)], side=tk.LEFT)
+        self.stats_trees["companies"] = self.create_stats_tree(content_frame, "Companies", [
+            ("Company", 200), ("Applications", 100), ("Responses", 100), ("Response rate", 110)])
+        self.refresh_statistics()
+
+    def create_stats_tree(self, parent, title, columns, side=tk.TOP):
+        section_frame = ttk.LabelFrame(parent, text=title, padding=5)
+        section_frame.pack(side=side, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tree = ttk.Treeview(section_frame, columns=[heading for heading, _ in columns], show="headings", height=8)
+        for heading, width in columns:
+            tree.heading(heading, text=heading)
+            tree.column(heading, width=width, anchor="w")
+        tree.pack(fill=tk.BOTH, expand=True)
+        return tree
+
+    def close_statistics(self):
+        self.stats_window.destroy()
+        self.stats_window = None
+        self.stats_trees = {}
+
+    def refresh_statistics(self):
+        # Reads the incrementally kept counters; nothing here scans the applications
+        if self.stats_window is None:
+            return
+        stats = self.repo.statistics()
+        def days(value):
+            return "-" if value is None else f"{value:.1f}"
+        rows = {
+            "stages": [(status, now, ever, days(done), days(current))
+                       for status, now, ever, done, current in stats.stages(datetime.now().timestamp())],
+            "months": stats.recent(stats.months),
+            "weeks": stats.recent(stats.weeks),
+            "companies": [(name, total, responses, f"{rate:.0%}")
+                          for name, total, responses, rate in stats.top_companies()],
+        }
+        for name, tree in self.stats_trees.items():
+            tree.delete(*tree.get_children())
+            for values in rows[name]:
+                tree.insert("", tk.END, values=values)
+
+    def import_file(self):
+        path = filedialog.askopenfilename(parent=self.root, title="Import Applications", filetypes=TRANSFER_FILETYPES)
+        if not path:
+            return
+        if self.search_after_id is not None: # Nor start a pending one; the view is refreshed at the end
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        self.search_generation += 1 # Stop any running search; the indexes are about to change
+        self.set_loading(True, "Importing applications...")
+        self.import_started = time.perf_counter()
+        self.root.after(1, self.continue_import, path, import_applications(self.repo, path), (0, 0, []))
+
+    def continue_import(self, path, steps, progress):
+        # One batch per event-loop slice so the window stays responsive
+        try:
+            progress = next(steps)
+        except StopIteration:
+            self.finish_import(path, progress)
+            return
+        except (OSError, ValueError, csv.Error) as e: # Rows already imported are kept
+            self.finish_import(path, progress, e)
+            return
+        self.loading_label.config(text=f"Importing applications... {progress[0]}")
+        self.root.after(1, self.continue_import, path, steps, progress)
+
+    def finish_import(self, path, progress, error=None):
+        imported, rejected, messages = progress
+        self.metrics.record("import", time.perf_counter() - self.import_started, imported)
+        self.set_loading(False)
+        self.update_treeview(self.search_var.get()) # One refresh for the whole import
+        self.refresh_statistics()
+        summary = f"Imported {imported} application(s) from {os.path.basename(path)}."
+        if rejected:
+            summary += f"\n\n{rejected} row(s) were skipped:\n" + "\n".join(messages[:self.IMPORT_MESSAGES_SHOWN])
+            if rejected > self.IMPORT_MESSAGES_SHOWN:
+                summary += "\n..."
+        if error is not None:
+            messagebox.showerror("Import Error", f"{summary}\n\nThe import stopped early: {error}")
+        else:
+            messagebox.showinfo("Import", summary)
+
+    def export_file(self):
+        path = filedialog.asksaveasfilename(parent=self.root, title="Export Applications", defaultextension=".csv",
+                                            filetypes=TRANSFER_FILETYPES)
+        if not path:
+            return
+        self.set_loading(True, "Exporting applications...")
+        self.root.after(1, self.continue_export, path, export_applications(self.repo, path), 0)
+
+    def continue_export(self, path, steps, count):
+        try:
+            count = next(steps)
+        except StopIteration:
+            self.set_loading(False)
+            messagebox.showinfo("Export", f"Exported {count} application(s) to {os.path.basename(path)}.")
+            return
+        except OSError as e:
+            self.set_loading(False)
+            messagebox.showerror("Export Error", f"Could not export applications: {e}")
+            return
+        self.loading_label.config(text=f"Exporting applications... {count}")
+        self.root.after(1, self.continue_export, path, steps, count)
+
     def set_today_date(self):
-        if self.selected_item_id is None: # Only set today if not editing
+        if self.selected_app_id is None: # Only set today if not editing
             today = datetime.now().strftime("%d/%m/%Y")
             self.date_entry.delete(0, tk.END)
             self.date_entry.insert(0, today)
 
-    def get_next_id(self):
-        if not self.applications:
-            return 1
-        return max(app.get("id", 0) for app in self.applications) + 1
-
     def add_or_edit_application(self):
         date_str = self.date_entry.get()
         company = self.company_entry.get()
@@ -257,70 +512,58 @@ class JobApplicationManager:
             return
 
         try:
-            dt_obj = datetime.strptime(date_str, "%d/%m/%Y")
+            app_data = build_application(date_str, company, job, description, status)
         except ValueError:
             messagebox.showerror("Error", "Date format must be DD/MM/YYYY.")
             return
 
-        timestamp = dt_obj.timestamp()
-
-        app_data = {
-            "date": date_str,
-            "company": company,
-            "job": job,
-            "description": description,
-            "status": status,
-            "timestamp": timestamp # Store timestamp for reliable sorting
-        }
-
-        if self.selected_item_id: # Editing existing
-            # Find the application in self.applications using the stored unique ID
-            unique_id_of_selected = self.tree.item(self.selected_item_id, 'tags')[0]
-            found = False
-            for i, app in enumerate(self.applications):
-                if str(app.get("id")) == str(unique_id_of_selected):
-                    app_data["id"] = app.get("id") # Preserve original ID
-                    self.applications[i] = app_data
-                    found = True
-                    break
-            if not found:
+        old_keys = {} # Where the record sits in the current view, before the change
+        if self.selected_app_id is not None: # Editing existing
+            # Find the application using the stored unique ID
+            app = self.repo.get(self.selected_app_id)
+            if app is None:
                 messagebox.showerror("Error", "Could not find the application to update.")
                 return
+            old_keys[str(app["id"])] = self.repo.sort_entry(self.sorted_by, app)[0]
+            if self.repo.update(app["id"], app_data) is None:
+                messagebox.showwarning("Warning", "This application was removed by another running copy of the app,"
+                                                  " so the changes were not saved.")
             
         else: # Adding new
-            app_data["id"] = self.get_next_id() # Assign a new unique ID
-            self.applications.append(app_data)
+            app = self.repo.add(app_data) # Assigns a new unique ID
 
-        self.save_data()
-        self.sort_applications() # Sort after add/edit
-        self.update_treeview(self.search_var.get()) # Preserve search filter
+        self.refresh_changed(old_keys, [app["id"]])
+        self.refresh_statistics()
         self.clear_form()
 
 
+    def get_selected_app_ids(self):
+        if self.virtual_mode:
+            return list(self.selected_ids)
+        # The unique app ID is stored as each item's tag
+        return [self.tree.item(item_id, 'tags')[0] for item_id in self.tree.selection()
+                if self.tree.item(item_id, 'tags')]
+
+
     def load_selected_to_form(self, event=None):
-        selected_items = self.tree.selection()
-        if not selected_items:
-            self.selected_item_id = None # Clear selection if nothing is selected
+        if self.virtual_mode and event is not None:
+            current_rows = set(self.tree.selection())
+            if current_rows == self.expected_tree_selection:
+                return # Selection event caused by re-rendering, not by the user
+            self.sync_virtual_selection(current_rows)
+
+        selected_ids = self.get_selected_app_ids()
+        if not selected_ids:
+            self.selected_app_id = None # Clear selection if nothing is selected
             self.submit_btn.config(text="Add Application")
             self.set_today_date() # Reset date to today if form is for new entry
             return
 
-        self.selected_item_id = selected_items[0] # Store IID of the selected item
-        
-        # Retrieve the unique ID from the tag
-        unique_app_id_tags = self.tree.item(self.selected_item_id, 'tags')
-        if not unique_app_id_tags:
-            messagebox.showerror("Error", "Selected item has no ID tag. Cannot load.")
-            return
-        unique_app_id = unique_app_id_tags[0]
+        unique_app_id = selected_ids[0]
+        self.selected_app_id = unique_app_id
 
 
-        selected_app = None
-        for app in self.applications:
-            if str(app.get("id")) == str(unique_app_id):
-                selected_app = app
-                break
-        
+        selected_app = self.repo.get(unique_app_id)
         if not selected_app:
             messagebox.showerror("Error", f"Could not find application with ID {unique_app_id} to load.")
             self.clear_form() # Clear form if app not found
@@ -333,13 +576,13 @@ class JobApplicationManager:
         self.job_entry.delete(0, tk.END)
         self.job_entry.insert(0, selected_app["job"])
         self.description_entry.delete("1.0", tk.END)
-        self.description_entry.insert("1.0", selected_app["description"])
+        self.description_entry.insert("1.0", self.repo.description(selected_app))
         self.status_var.set(selected_app["status"])
         self.submit_btn.config(text="Edit Application")
 
 
     def clear_form(self):
-        self.selected_item_id = None
+        self.selected_app_id = None
         # self.date_entry.delete(0, tk.END) # Keep date as today or last entry
         self.set_today_date()
         self.company_entry.delete(0, tk.END)
@@ -350,87 +593,420 @@ class JobApplicationManager:
         self.search_entry.focus() # Set focus back to search or a relevant field
 
     def remove_selected(self):
-        selected_items = self.tree.selection()
-        if not selected_items:
+        ids_to_remove = self.get_selected_app_ids()
+        if not ids_to_remove:
             messagebox.showwarning("Warning", "No application selected to remove.")
             return
 
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to remove the selected application(s)?"):
-            ids_to_remove = []
-            for item_id in selected_items:
-                unique_app_id_tags = self.tree.item(item_id, 'tags')
-                if unique_app_id_tags:
-                    ids_to_remove.append(unique_app_id_tags[0])
-            
-            self.applications = [app for app in self.applications if str(app.get("id")) not in ids_to_remove]
-            
-            self.save_data()
-            self.update_treeview(self.search_var.get()) # Update tree with current filter
+            old_keys = {str(app["id"]): self.repo.sort_entry(self.sorted_by, app)[0]
+                        for app in map(self.repo.get, ids_to_remove) if app}
+            self.repo.remove(ids_to_remove)
+            self.refresh_changed(old_keys, [])
+            self.refresh_statistics()
             self.clear_form()
 
 
     def sort_applications(self):
+        # The repository keeps a sorted index per option, so sorting only picks which
+        # one the view reads from. Returns True if the order changed.
         sort_key = self.sort_var.get()
-        reverse_order = False
-        key_func = None
-
-        if sort_key == "New to Old":
-            reverse_order = True
-            key_func = lambda app: app.get("timestamp", 0)
-        elif sort_key == "Old to New":
-            key_func = lambda app: app.get("timestamp", 0)
-        elif sort_key == "Company A-Z":
-            key_func = lambda app: app.get("company", "").lower()
-        elif sort_key == "Job Title A-Z":
-            key_func = lambda app: app.get("job", "").lower()
-        elif sort_key == "Status A-Z":
-            key_func = lambda app: app.get("status", "").lower()
-        
-        if key_func:
-            self.applications.sort(key=key_func, reverse=reverse_order)
+        if sort_key == self.sorted_by or sort_key not in SORT_OPTIONS:
+            return False # Already in this order, nothing to do
+        self.sorted_by = sort_key
+        return True
+
+
+    def date_range(self):
+        return parse_date_range(self.date_from_var.get(), self.date_to_var.get())
 
 
     def sort_and_refresh_treeview(self, event=None):
-        self.sort_applications()
-        self.update_treeview(self.search_var.get())
+        with self.metrics.measure("sort_applications") as measurement:
+            self.sort_applications()
+            self.update_treeview(self.search_var.get())
+            measurement.rows = len(self.view_ids)
 
 
     def update_treeview(self, filter_text=""):
+        self.search_generation += 1 # Supersedes any search still in progress
+        self.search_started = None
+        self.repo.take_external_changes() # Already reflected by the query below
+        date_range = self.date_range()
+        # Filter applications first, through the search and sorted indexes
+        with self.metrics.measure("filter") as measurement:
+            filtered_apps = self.repo.query(filter_text, self.sorted_by, *date_range)
+            measurement.rows = len(filtered_apps)
+        self.last_query = filter_text.lower()
+        self.last_range = date_range
+        self.render_treeview(filtered_apps)
+
+
+    def render_treeview(self, filtered_apps):
+        with self.metrics.measure("render") as measurement:
+            self.fill_treeview(filtered_apps)
+            measurement.rows = len(self.view_ids)
+
+
+    def fill_treeview(self, filtered_apps):
+        if isinstance(filtered_apps, PagedResult):
+            self.view_ids = filtered_apps.ids # Rows are fetched page by page as they are shown
+        else:
+            self.view_ids = [app["id"] for app in filtered_apps]
+        if self.renumber_after_id is not None:
+            self.root.after_cancel(self.renumber_after_id)
+            self.renumber_after_id = None
+        self.renumber_from = None
+        self.selected_ids.clear() # A rebuilt view starts without a selection, as the full tree does
         self.tree.delete(*self.tree.get_children())
-        
-        # Filter applications first
-        filtered_apps = self.applications
-        if filter_text:
-            filter_text = filter_text.lower()
-            filtered_apps = [
-                app for app in filtered_apps if
-                filter_text in app.get("company", "").lower() or
-                filter_text in app.get("job", "").lower() or
-                filter_text in app.get("description", "").lower() or
-                filter_text in app.get("status", "").lower()
-            ]
-        
-        # Then display
+        self.virtual_mode = len(self.view_ids) > self.VIRTUAL_THRESHOLD
+        if self.virtual_mode:
+            self.render_virtual_window()
+            return
         for i, app in enumerate(filtered_apps):
             # Use the app's unique ID as a tag for later retrieval
             app_unique_id = app.get("id", f"fallback_{i}") # Fallback if ID somehow missing
-            # The first value in `values` will be the visual index for the "ID" column
-            self.tree.insert("", tk.END, iid=f"item_{app_unique_id}", values=(
-                i + 1, # Visual 1-based index
-                app["date"],
-                app["company"],
-                app["job"],
+            self.tree.insert("", tk.END, iid=f"item_{app_unique_id}", values=self.row_values(i, app),
+                             tags=(str(app_unique_id),)) # Store unique app ID in tag
+
+
+    def refresh_changed(self, old_keys, changed_ids):
+        # Apply a few added/edited/removed records to the current view instead of
+        # rebuilding it. old_keys maps str(app id) to the sort key each touched record had
+        # in the view (absent for new records); changed_ids are the records to (re)place.
+        # Records the repository merged from other instances since the last refresh are
+        # added to both.
+        old_keys = dict(old_keys)
+        changed = {str(app_id): app_id for app_id in changed_ids}
+        for app_key, old_app in self.repo.take_external_changes().items():
+            if old_app is not None and app_key not in old_keys:
+                old_keys[app_key] = self.repo.sort_entry(self.sorted_by, old_app)[0]
+            changed.setdefault(app_key, app_key)
+        changed_ids = list(changed.values())
+        if (self.repo.paged_results or self.search_after_id is not None or self.search_started is not None
+                or self.search_var.get().lower() != self.last_query or self.date_range() != self.last_range
+                or len(changed_ids) > self.REFRESH_CHANGED_LIMIT):
+            # Paged results are cheap to re-query. Otherwise a search is pending or in
+            # flight, or so much changed that patching would be slower; let a full
+            # refresh pick up the query too
+            if self.search_after_id is not None:
+                self.root.after_cancel(self.search_after_id)
+                self.search_after_id = None
+            self.sort_applications()
+            self.update_treeview(self.search_var.get())
+            return
+
+        reverse = SORT_OPTIONS[self.sorted_by][1]
+        stale_keys = dict(old_keys) # Touched records still in the view, at their old key
+        def view_key(view_id):
+            key = stale_keys.get(str(view_id))
+            return key if key is not None else self.repo.sort_entry(self.sorted_by, self.repo.get(view_id))[0]
+
+        old_positions = []
+        left_view = set()
+        for app_key, old_key in old_keys.items():
+            position = bisect_ordered(self.view_ids, old_key, view_key, reverse)
+            if position < len(self.view_ids) and str(self.view_ids[position]) == app_key:
+                del self.view_ids[position]
+                old_positions.append(position)
+                left_view.add(app_key)
+            del stale_keys[app_key]
+
+        placed = {}
+        for app_id in changed_ids:
+            app = self.repo.get(app_id)
+            if app is None or not self.repo.matches(app, self.last_query, *self.last_range):
+                continue
+            key = self.repo.sort_entry(self.sorted_by, app)[0]
+            self.view_ids.insert(bisect_ordered(self.view_ids, key, view_key, reverse), app["id"])
+            placed[str(app["id"])] = key
+        if not old_positions and not placed:
+            return
+
+        if self.virtual_mode:
+            self.selected_ids.clear()
+            self.render_virtual_window() # Rewrites the visible rows, numbering included
+            return
+
+        # Final positions, once every insert is done
+        positions = {app_key: bisect_ordered(self.view_ids, key, view_key, reverse) for app_key, key in placed.items()}
+        for app_key in left_view - set(placed):
+            self.tree.delete(f"item_{app_key}")
+        for app_key in left_view & set(placed):
+            self.tree.detach(f"item_{app_key}") # Re-attached at its new position below
+        # Place in ascending order so every earlier row is already where it belongs
+        for app_key in sorted(placed, key=positions.get):
+            position = positions[app_key]
+            app = self.repo.get(app_key)
+            if app_key in left_view:
+                self.tree.move(f"item_{app_key}", "", position)
+                self.tree.item(f"item_{app_key}", values=self.row_values(position, app))
+            else:
+                self.tree.insert("", position, iid=f"item_{app_key}", values=self.row_values(position, app),
+                                 tags=(app_key,))
+        self.tree.selection_set(())
+        self.schedule_renumber(min(old_positions + list(positions.values())))
+
+
+    def schedule_renumber(self, start):
+        # The visual "ID" column of rows after an insert/delete is fixed up in idle time
+        if self.renumber_from is None or start < self.renumber_from:
+            self.renumber_from = start
+        if self.renumber_after_id is None:
+            self.renumber_after_id = self.root.after_idle(self.renumber_rows)
+
+
+    def renumber_rows(self):
+        self.renumber_after_id = None
+        start, self.renumber_from = self.renumber_from, None
+        if start is None or self.virtual_mode:
+            return
+        end = min(len(self.view_ids), start + self.RENUMBER_CHUNK_SIZE)
+        for position in range(start, end):
+            self.tree.set(f"item_{self.view_ids[position]}", "index", position + 1)
+        if end < len(self.view_ids):
+            self.renumber_from = end
+            self.renumber_after_id = self.root.after(1, self.renumber_rows)
+
+
+    def row_values(self, position, app):
+        # The first value will be the visual 1-based index for the "ID" column
+        return (position + 1, app["date"], app["company"], app["job"],
                 "View Details", # Placeholder text for the button/action column
-                app["status"]
-            ), tags=(str(app_unique_id),)) # Store unique app ID in tag
+                app["status"])
+
+
+    def visible_row_count(self):
+        height = self.tree.winfo_height()
+        if height <= 1: # Not laid out yet
+            return 20
+        return max(1, (height - self.TREE_HEADING_HEIGHT) // self.TREE_ROW_HEIGHT)
+
+
+    def render_virtual_window(self):
+        # Only the rows in view (plus a small buffer) exist in the Treeview. They are
+        # recycled as "row_<n>" items whose values and ID tag are rewritten on scroll.
+        total = len(self.view_ids)
+        visible = self.visible_row_count()
+        self.virtual_top = max(0, min(self.virtual_top, total - visible))
+        wanted = min(total - self.virtual_top, visible + self.VIRTUAL_BUFFER_ROWS)
+        rows = self.tree.get_children()
+        if len(rows) > wanted:
+            self.tree.delete(*rows[wanted:])
+        for n in range(len(rows), wanted):
+            self.tree.insert("", tk.END, iid=f"row_{n}")
+
+        selected_rows = []
+        for n in range(wanted):
+            position = self.virtual_top + n
+            app = self.repo.get(self.view_ids[position])
+            row_iid = f"row_{n}"
+            self.tree.item(row_iid, values=self.row_values(position, app), tags=(str(app["id"]),))
+            if str(app["id"]) in self.selected_ids:
+                selected_rows.append(row_iid)
+        self.expected_tree_selection = set(selected_rows)
+        self.tree.selection_set(selected_rows)
+        self.tree.yview_moveto(0)
+        if total:
+            self.tree_scrollbar.set(self.virtual_top / total, min(1.0, (self.virtual_top + visible) / total))
+        else:
+            self.tree_scrollbar.set(0, 1)
+
+
+    def scroll_virtual(self, rows):
+        top = self.virtual_top
+        self.virtual_top = max(0, min(top + rows, len(self.view_ids) - self.visible_row_count()))
+        if self.virtual_top != top:
+            self.render_virtual_window()
+
+
+    def sync_virtual_selection(self, current_rows):
+        # Fold the user's selection of rendered rows into selected_ids; selected
+        # applications scrolled out of view stay selected.
+        for row_iid in self.tree.get_children():
+            tags = self.tree.item(row_iid, 'tags')
+            if not tags:
+                continue
+            if row_iid in current_rows:
+                self.selected_ids[str(tags[0])] = True
+            else:
+                self.selected_ids.pop(str(tags[0]), None)
+        self.expected_tree_selection = current_rows
+
+
+    def on_scrollbar(self, *args):
+        if not self.virtual_mode:
+            self.tree.yview(*args)
+            return
+        visible = self.visible_row_count()
+        if args[0] == "moveto":
+            self.scroll_virtual(int(float(args[1]) * len(self.view_ids)) - self.virtual_top)
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.scroll_virtual(step * visible if args[2] == "pages" else step)
+
+
+    def on_tree_yscroll(self, first, last):
+        if not self.virtual_mode: # In virtual mode the scrollbar reflects virtual_top instead
+            self.tree_scrollbar.set(first, last)
+
+
+    def on_tree_click(self, event):
+        # A plain click replaces the selection, including rows scrolled out of view
+        if self.virtual_mode and not event.state & 0x0005: # Shift or Control held
+            self.selected_ids.clear()
+
+
+    def on_tree_resize(self, event=None):
+        if self.virtual_mode:
+            self.render_virtual_window()
+
+
+    def on_tree_mousewheel(self, event):
+        if not self.virtual_mode:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.scroll_virtual(-3)
+        else:
+            self.scroll_virtual(3)
+        return "break"
+
+
+    def on_tree_page(self, direction):
+        if not self.virtual_mode:
+            return None
+        self.scroll_virtual(direction * self.visible_row_count())
+        return "break"
+
+
+    def on_tree_arrow(self, step):
+        # Moving past the first/last visible row scrolls the window and selects the next application
+        if not self.virtual_mode:
+            return None
+        rows = self.tree.get_children()
+        focus = self.tree.focus()
+        if focus not in rows:
+            return None
+        position = rows.index(focus)
+        if 0 <= position + step < self.visible_row_count():
+            return None # Default Treeview handling within the window
+        top = self.virtual_top
+        self.scroll_virtual(step)
+        if self.virtual_top == top:
+            return "break" # Already at the start or end of the list
+        next_id = str(self.view_ids[self.virtual_top + position])
+        self.selected_ids = {next_id: True}
+        self.render_virtual_window()
+        self.tree.focus(f"row_{position}")
+        self.load_selected_to_form()
+        return "break"
 
 
     def filter_applications_event(self, event=None): # Renamed to avoid conflict
-        self.sort_applications() # Ensure sorting is applied before filtering/displaying
-        self.update_treeview(self.search_var.get())
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        if event is None: # Search button: run right away
+            self.run_search()
+        else: # Keystroke: wait until typing pauses
+            self.search_after_id = self.root.after(self.SEARCH_DEBOUNCE_MS, self.run_search)
+
+
+    def run_search(self):
+        self.search_after_id = None
+        self.search_generation += 1
+        generation = self.search_generation
+        self.search_started = time.perf_counter()
+        self.repo.take_external_changes() # The query below reads the merged records
+        query = self.search_var.get().lower()
+        date_range = self.date_range()
+        order_changed = self.sort_applications() # No-op unless the sort option changed
+        self.virtual_top = 0 # A new query starts at the top of its results
+        if self.repo.paged_results:
+            # The database does the filtering and sorting; only a page is read per screen
+            self.last_query, self.last_range = query, date_range
+            with self.metrics.measure("filter") as measurement:
+                result = self.repo.query(query, self.sorted_by, *date_range)
+                measurement.rows = len(result)
+            self.render_treeview(result)
+            self.search_started = None
+            return
+        within = None
+        if (not order_changed and self.last_query and self.last_query in query
+                and date_range == self.last_range):
+            # The new query only adds characters, so its matches are a subset of the current view
+            within = map(self.repo.get, self.view_ids)
+        matches = self.repo.iter_query(query, self.sorted_by, *date_range, within=within)
+        self.continue_search(generation, (query, date_range), matches, [])
+
+
+    def continue_search(self, generation, query, matches, results):
+        # query is the (lowercased text, date range) pair being searched for
+        if generation != self.search_generation:
+            return # A newer search or refresh has taken over
+        chunk = list(islice(matches, self.SEARCH_CHUNK_SIZE))
+        results.extend(chunk)
+        if len(chunk) == self.SEARCH_CHUNK_SIZE:
+            # Yield to the event loop so a newer keystroke can cancel this search
+            self.root.after(1, self.continue_search, generation, query, matches, results)
+            return
+        self.last_query, self.last_range = query
+        # Includes the time spent yielding to the event loop, as the user waits through it
+        self.metrics.record("filter", time.perf_counter() - self.search_started, len(results))
+        self.search_started = None
+        self.render_treeview(results)
+
+
+def run_headless(args):
+    # --import/--export: work on the data file without opening a window
+    repo = None
+    try:
+        repo = open_repository(args.storage, DATA_FILE)
+        repo.load()
+    except Exception as e: # Anything a damaged data file raises, as in load_in_background
+        print(f"Error: could not load applications from {DATA_FILE}: {e}", file=sys.stderr)
+        if repo is not None:
+            repo.close()
+        return 1
+    try:
+        if args.import_file:
+            for imported, rejected, messages in import_applications(repo, args.import_file):
+                print(f"Imported {imported} application(s)...", file=sys.stderr)
+            for message in messages:
+                print(f"Skipped {message}", file=sys.stderr)
+            if rejected > len(messages):
+                print(f"... and {rejected - len(messages)} more", file=sys.stderr)
+            print(f"Imported {imported} application(s), skipped {rejected}.", file=sys.stderr)
+        if args.export_file:
+            for count in export_applications(repo, args.export_file):
+                pass
+            print(f"Exported {count} application(s) to {args.export_file}.", file=sys.stderr)
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        repo.close()
+    return 0
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Track and manage job applications.")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default="json",
+                        help="json (default) or sqlite; sqlite imports applications.json on first use")
+    parser.add_argument("--profile", action="store_true",
+                        help="time loading, saving, sorting, filtering and rendering, shown in a status bar"
+                             " (or set JOBAPP_PROFILE=1)")
+    parser.add_argument("--profile-output", metavar="FILE", default=os.environ.get("JOBAPP_PROFILE_OUTPUT"),
+                        help="with profiling on, write p50/p95/max latencies to FILE (.csv or .json) on exit")
+    parser.add_argument("--import", dest="import_file", metavar="FILE",
+                        help="add the applications in FILE (.csv or .jsonl) and exit without opening a window")
+    parser.add_argument("--export", dest="export_file", metavar="FILE",
+                        help="write all applications to FILE (.csv or .jsonl) and exit without opening a window")
+    args = parser.parse_args()
+    if args.import_file or args.export_file:
+        sys.exit(run_headless(args))
+    profile = args.profile or os.environ.get("JOBAPP_PROFILE", "") not in ("", "0")
     root = tk.Tk()
-    app = JobApplicationManager(root)
+    app = JobApplicationManager(root, storage=args.storage, metrics=Metrics(enabled=profile),
+                                metrics_output=args.profile_output if profile else None)
     root.mainloop()
\ No newline at end of file
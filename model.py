@@ -0,0 +1,2135 @@
+# Data model for the Job Application Manager: storage backends, indexes and
+# queries. Nothing here depends on Tk, so it can be driven headless (see bench.py).
+import csv
+import json
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from array import array
+from bisect import bisect_left, insort
+import gc
+import hashlib
+import heapq
+import marshal
+import mmap
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    # Advisory lock on applications.json.lock, shared by every instance working on the
+    # same data file. It is re-entrant within the process and counts holders, because a
+    # change takes it on the Tk thread and the background writer lets go of it once the
+    # change is on disk. acquire() returns True if this call took the file lock, False
+    # if the process already held it, and None if blocking is off and another process
+    # has it.
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.depth = 0
+        self.mutex = threading.Lock()
+
+    @property
+    def held(self):
+        return self.depth > 0
+
+    def acquire(self, blocking=True):
+        with self.mutex:
+            if self.depth == 0:
+                f = open(self.path, "a+b")
+                try:
+                    self._lock(f, blocking)
+                except BlockingIOError:
+                    f.close()
+                    return None
+                self.file = f
+            self.depth += 1
+            return self.depth == 1
+
+    def release(self):
+        with self.mutex:
+            self.depth -= 1
+            if self.depth == 0:
+                self._unlock(self.file)
+                self.file.close()
+                self.file = None
+
+    def _lock(self, f, blocking):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if not blocking:
+                    raise BlockingIOError
+                # LK_LOCK gives up after about 10 seconds; keep waiting
+
+    def _unlock(self, f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JournalStore:
+    # applications.json holds a compacted snapshot; every add/edit/delete is appended
+    # to a JSON-lines journal next to it, so a save costs one small write instead of
+    # re-serializing the whole list. The journal is folded back into the snapshot
+    # once it grows past the compaction threshold.
+    MIN_COMPACT_BYTES = 1024 * 1024 # Never compact for journals smaller than this
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        # Sizes are tracked in memory so the compaction check doesn't depend on
+        # writes that may still be queued on the background writer
+        self.snapshot_size = 0
+        self.journal_size = 0
+        # Snapshot file as last read or written by this instance. With no writes in
+        # flight, the files differ from it and journal_size only if someone else wrote.
+        self.seen_snapshot = None
+
+    def snapshot_signature(self):
+        try:
+            st = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns) # A replaced file has a new inode
+
+    def journal_disk_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def changed_on_disk(self):
+        # Two stats; cheap enough to poll
+        return (self.snapshot_signature() != self.seen_snapshot
+                or self.journal_disk_size() != self.journal_size)
+
+    def load_snapshot(self):
+        self.journal_size = 0
+        self.seen_snapshot = self.snapshot_signature()
+        if not os.path.exists(self.snapshot_path):
+            self.snapshot_size = 0
+            return []
+        self.snapshot_size = os.path.getsize(self.snapshot_path)
+        with open(self.snapshot_path, 'r', encoding="utf-8") as f:
+            return json.load(f) # JSONDecodeError is left to the caller
+
+    def replay_journal(self, records):
+        # Apply journal entries over the snapshot. Entries are keyed by id, so replaying
+        # a journal that was already folded into the snapshot is harmless.
+        positions = {str(app.get("id")): i for i, app in enumerate(records)}
+        for entry in self.read_journal():
+            if entry.get("op") == "put":
+                record = entry["record"]
+                key = str(record.get("id"))
+                if key in positions:
+                    records[positions[key]] = record
+                else:
+                    positions[key] = len(records)
+                    records.append(record)
+            elif entry.get("op") == "delete":
+                for key in entry["ids"]:
+                    pos = positions.pop(str(key), None)
+                    if pos is not None:
+                        records[pos] = None
+        return [app for app in records if app is not None]
+
+    def read_journal(self, offset=0):
+        # Yields the journal entries from byte offset on and leaves journal_size at the
+        # end of the last one. A torn write from a crash is cut off the file along with
+        # everything after it.
+        self.journal_size = offset
+        if not os.path.exists(self.journal_path):
+            return
+        good_offset = offset
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break # Torn write from a crash, everything after it is discarded
+                if not line.endswith(b"\n"):
+                    break
+                good_offset += len(line)
+                yield entry
+        if good_offset < os.path.getsize(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_offset)
+        self.journal_size = good_offset
+
+    def put_line(self, record):
+        return self.encode({"op": "put", "record": record})
+
+    def delete_line(self, ids):
+        return self.encode({"op": "delete", "ids": list(ids)})
+
+    def encode(self, entry):
+        line = (json.dumps(entry, separators=(",", ":"), default=Application.to_dict) + "\n").encode("utf-8")
+        self.journal_size += len(line)
+        return line
+
+    def write_lines(self, lines):
+        # One append and one fsync for any number of entries
+        with open(self.journal_path, 'ab') as f:
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def needs_compaction(self):
+        # Let the journal grow relative to the snapshot so compaction cost stays amortized
+        return self.journal_size > max(self.MIN_COMPACT_BYTES, self.snapshot_size // 2)
+
+    def compact(self, records):
+        # Write the new snapshot next to the old one and atomically swap it in, then
+        # drop the journal. A crash between the two steps only leaves a journal that
+        # replays to the same state.
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, 'w', encoding="utf-8") as f:
+            json.dump(records, f, indent=2, default=Application.to_dict)
+            f.flush()
+            os.fsync(f.fileno())
+            self.snapshot_size = f.tell()
+        os.replace(tmp_path, self.snapshot_path)
+        self.seen_snapshot = self.snapshot_signature()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+class SnapshotCache:
+    # applications.json.cache holds the repository as last loaded or saved: normalized
+    # records and the sorted index entries, so a start takes one read instead of parsing
+    # the JSON, replaying the journal and re-sorting. It is only used while its key
+    # still matches the files on disk; anything else (missing, stale, corrupt) falls
+    # back to the JSON. Writes are best effort, the JSON stays authoritative.
+    # The data folder may be synced or shared, so the file is marshal data made of
+    # plain tuples, lists, dicts, strings and numbers (records as their slot values),
+    # which unlike a pickle cannot run code when it is read.
+    MAGIC = b"JAMCACHE3\n"
+    HASH_BLOCK = 64 * 1024 # Bytes hashed from each end of the snapshot
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.path = snapshot_path + ".cache"
+
+    def key(self):
+        # (snapshot size, mtime, hash of its first and last block, journal size, mtime)
+        try:
+            snapshot = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.snapshot_path, "rb") as f:
+            digest.update(f.read(self.HASH_BLOCK))
+            if snapshot.st_size > self.HASH_BLOCK:
+                f.seek(max(self.HASH_BLOCK, snapshot.st_size - self.HASH_BLOCK))
+                digest.update(f.read())
+        try:
+            journal = os.stat(self.journal_path)
+            journal_key = (journal.st_size, journal.st_mtime_ns)
+        except FileNotFoundError:
+            journal_key = (0, None)
+        return (snapshot.st_size, snapshot.st_mtime_ns, digest.hexdigest()) + journal_key
+
+    def load(self):
+        # The cached state if it is still valid, else None
+        try:
+            key = self.key()
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if key is None or not data.startswith(self.MAGIC):
+            return None
+        # Loading allocates every record at once; the cyclic GC would only rescan them
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            state = marshal.loads(memoryview(data)[len(self.MAGIC):])
+            if not isinstance(state, tuple) or len(state) != 3 or state[0] != key:
+                return None
+            _, slots, indexes = state
+            slot_count = len(Application.__slots__)
+            if not isinstance(indexes, dict) or any(len(values) != slot_count for values in slots):
+                return None
+            records = [Application(*values) for values in slots]
+        except (EOFError, ValueError, TypeError): # Truncated, damaged or not what we wrote
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return {"key": key, "records": records, "indexes": indexes}
+
+    def write(self, records, indexes):
+        # Must run once the files on disk match records, with no writes in between
+        try:
+            key = self.key()
+            if key is None:
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self.MAGIC)
+                marshal.dump((key, [app.slot_values() for app in records], indexes), f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass # Next start parses the JSON and tries again
+
+
+class StatusHistory:
+    # Append-only JSON-lines log of status changes (applications.json.history), one
+    # {"id", "from", "to", "at"} entry per edit that changed a status. Statistics replay
+    # it to tell how long applications spent in each stage.
+    # Ids can be reused after a delete (next_id restarts from the highest one on load),
+    # so deletes log a {"removed": [ids], "at"} marker and read() drops what came before.
+    def __init__(self, snapshot_path):
+        self.path = snapshot_path + ".history"
+
+    def line(self, app_id, old_status, new_status, at):
+        entry = {"id": app_id, "from": old_status, "to": new_status, "at": at}
+        return self.encode(entry)
+
+    def removal_line(self, app_ids, at):
+        return self.encode({"removed": list(app_ids), "at": at})
+
+    def encode(self, entry):
+        return (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def write_lines(self, lines):
+        with open(self.path, "ab") as f:
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        removed_at = {} # str(id) -> position of its last removal marker
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break # Torn write from a crash; nothing valid follows it
+                if "removed" in entry:
+                    for app_id in entry["removed"]:
+                        removed_at[str(app_id)] = len(entries)
+                else:
+                    entries.append(entry)
+        if not removed_at:
+            return entries
+        return [entry for i, entry in enumerate(entries) if i >= removed_at.get(str(entry["id"]), 0)]
+
+
+class DescriptionStore:
+    # Job descriptions live outside applications.json in append-only blob files
+    # (applications.json.blob.<generation>), optionally zlib-compressed. Records keep only
+    # a "description_ref" of [generation, offset, length, codec], and text is read on
+    # demand through a memory map. Superseded blobs are garbage until the snapshot is
+    # compacted, which copies live descriptions into a fresh generation.
+    RAW, ZLIB = 0, 1
+    COMPRESS_MIN_BYTES = 256 # Shorter descriptions are stored as-is
+
+    def __init__(self, snapshot_path, compress=True):
+        self.base_path = snapshot_path + ".blob."
+        self.compress = compress
+        self.generation = max(self.existing_generations(), default=1)
+        self.maps = {} # generation -> (file, mmap)
+        self.live_bytes = 0 # Bytes of the current generation still referenced
+        self.sizes = {} # generation -> file size including writes not yet on disk
+        self.pending = {} # (generation, offset) -> data queued but not yet written
+        self.submit = self.write_blobs # Replaced by the repository when writes go through a BackgroundWriter
+
+    def path_for(self, generation):
+        return f"{self.base_path}{generation}"
+
+    def existing_generations(self):
+        folder = os.path.dirname(self.base_path) or "."
+        prefix = os.path.basename(self.base_path)
+        return [int(name[len(prefix):]) for name in os.listdir(folder)
+                if name.startswith(prefix) and name[len(prefix):].isdigit()]
+
+    def put(self, text):
+        return self.put_many([text])[0]
+
+    def put_many(self, texts):
+        # Refs for texts, written out with a single submit
+        blobs, refs = [], []
+        for text in texts:
+            data = text.encode("utf-8")
+            codec = self.RAW
+            if self.compress and len(data) >= self.COMPRESS_MIN_BYTES:
+                packed = zlib.compress(data)
+                if len(packed) < len(data):
+                    data, codec = packed, self.ZLIB
+            blobs.append(self._reserve(data))
+            refs.append([blobs[-1][0], blobs[-1][1], len(data), codec])
+        if blobs:
+            self.submit(blobs)
+        return refs
+
+    def _size(self, generation):
+        if generation not in self.sizes:
+            path = self.path_for(generation)
+            self.sizes[generation] = os.path.getsize(path) if os.path.exists(path) else 0
+        return self.sizes[generation]
+
+    def _reserve(self, data):
+        # The offset is reserved now; the bytes are written (in order, ahead of any
+        # journal entry referencing them) by submit, and served from memory until then.
+        offset = self._size(self.generation)
+        self.sizes[self.generation] = offset + len(data)
+        self.pending[(self.generation, offset)] = data
+        self.live_bytes += len(data)
+        return (self.generation, offset, data)
+
+    def write_blobs(self, blobs):
+        # blobs is a list of (generation, offset, data); one write and fsync per file
+        by_generation = {}
+        for generation, offset, data in blobs:
+            by_generation.setdefault(generation, []).append((offset, data))
+        for generation, chunks in by_generation.items():
+            path = self.path_for(generation)
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                f.seek(chunks[0][0])
+                for offset, data in chunks:
+                    if f.tell() != offset:
+                        f.seek(offset)
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            for offset, data in chunks:
+                self.pending.pop((generation, offset), None)
+
+    def _read_raw(self, ref):
+        generation, offset, length, codec = ref
+        if length == 0:
+            return b""
+        data = self.pending.get((generation, offset))
+        if data is not None:
+            return data
+        entry = self.maps.get(generation)
+        if entry is None or len(entry[1]) < offset + length:
+            # First read of this generation, or the file has grown since it was mapped
+            self._unmap(generation)
+            f = open(self.path_for(generation), 'rb')
+            entry = self.maps[generation] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return entry[1][offset:offset + length]
+
+    def get(self, ref):
+        data = self._read_raw(ref)
+        if ref[3] == self.ZLIB:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
+
+    def discard(self, ref):
+        if ref[0] == self.generation:
+            self.live_bytes -= ref[2]
+
+    def track(self, ref):
+        # Count a ref loaded from disk towards the live bytes of its generation
+        if ref[0] == self.generation:
+            self.live_bytes += ref[2]
+
+    def needs_rewrite(self):
+        size = self._size(self.generation)
+        return size > self.COMPRESS_MIN_BYTES and self.live_bytes < size // 2
+
+    def start_generation(self):
+        self.generation = max(self.existing_generations() + [self.generation]) + 1
+        self.live_bytes = 0
+
+    def copy(self, ref):
+        # Copy a blob into the current generation without decompressing it
+        blob = self._reserve(self._read_raw(ref))
+        self.submit([blob])
+        return [blob[0], blob[1], len(blob[2]), ref[3]]
+
+    def release(self, keep):
+        # Close the maps of generations that no record references any more
+        for generation in list(self.maps):
+            if generation != self.generation and generation not in keep:
+                self._unmap(generation)
+
+    def drop_generations(self, keep):
+        # May run on the writer thread; release() must have been called first
+        for generation in self.existing_generations():
+            if generation != self.generation and generation not in keep:
+                try:
+                    os.remove(self.path_for(generation))
+                except OSError:
+                    pass # Still open elsewhere (Windows); retried after the next compaction
+
+    def refresh(self):
+        # Another instance wrote: file sizes are re-read before the next append, and
+        # files it may have replaced are mapped again on the next read
+        self.sizes.clear()
+        for generation in list(self.maps):
+            self._unmap(generation)
+
+    def _unmap(self, generation):
+        entry = self.maps.pop(generation, None)
+        if entry is not None:
+            entry[1].close()
+            entry[0].close()
+
+
+class BackgroundWriter:
+    # A single thread that performs the repository's disk writes in submission order,
+    # so saving never blocks the Tk loop. Whatever has queued up while the previous
+    # write ran is handled as one batch: consecutive writes of the same kind are
+    # combined into one call of handler(kind, payloads), and journal appends queued
+    # before a compaction are dropped because the new snapshot already contains them.
+    # Errors are collected in self.errors for the GUI to poll.
+    def __init__(self, handler):
+        self.handler = handler
+        self.queue = queue.Queue()
+        self.errors = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, kind, payload):
+        self.queue.put((kind, payload))
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            writes = [item for item in batch if item is not None]
+            last_compact = max((i for i, (kind, _) in enumerate(writes) if kind == "compact"), default=-1)
+            writes = [item for i, item in enumerate(writes) if item[0] != "journal" or i > last_compact]
+            groups = []
+            for kind, payload in writes:
+                if groups and groups[-1][0] == kind:
+                    groups[-1][1].append(payload)
+                else:
+                    groups.append((kind, [payload]))
+            for kind, payloads in groups:
+                try:
+                    self.handler(kind, payloads)
+                except Exception as e:
+                    self.errors.put(e)
+            for _ in batch:
+                self.queue.task_done()
+
+
+class Metrics:
+    # Opt-in latency recording for the hot paths. Each operation keeps its most recent
+    # samples, from which p50/p95/max are reported; `last` is the latest user-facing
+    # measurement for the GUI overlay (lookups and background writes, recorded with
+    # overlay=False, only go into the percentiles). Disabled, measure() still works but records nothing and
+    # wrap() leaves methods untouched, so the lookups stay uninstrumented.
+    WINDOW = 1000 # Samples kept per operation
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.samples = {} # Operation name -> deque of recent durations in seconds
+        self.counts = {} # Operation name -> total number of measurements
+        self.last = None # (operation, seconds, rows) of the most recent measurement
+        self.lock = threading.Lock() # Loading and writing are measured off the Tk thread
+
+    def record(self, name, seconds, rows=None, overlay=True):
+        if not self.enabled:
+            return
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.WINDOW)
+            samples.append(seconds)
+            self.counts[name] = self.counts.get(name, 0) + 1
+            if overlay:
+                self.last = (name, seconds, rows)
+
+    def measure(self, name):
+        # with metrics.measure("filter") as m: ...; m.rows = len(result)
+        return Measurement(self, name)
+
+    def wrap(self, obj, names, prefix="", overlay=True):
+        # Replaces the named methods of obj with timed versions
+        if not self.enabled:
+            return
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, self._timed(prefix + name, method, overlay))
+
+    def _timed(self, name, method, overlay):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start, overlay=overlay)
+        return timed
+
+    def summary(self):
+        with self.lock:
+            samples = [(name, sorted(values), self.counts[name]) for name, values in self.samples.items()]
+        rows = []
+        for name, values, count in sorted(samples):
+            def percentile(p):
+                return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 3)
+            rows.append({"operation": name, "count": count, "p50_ms": percentile(0.5),
+                         "p95_ms": percentile(0.95), "max_ms": round(values[-1] * 1000, 3)})
+        return rows
+
+    def dump(self, path):
+        # CSV for a .csv path, JSON otherwise
+        rows = self.summary()
+        with open(path, "w", newline="") as f:
+            if path.lower().endswith(".csv"):
+                writer = csv.DictWriter(f, fieldnames=["operation", "count", "p50_ms", "p95_ms", "max_ms"])
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump(rows, f, indent=2)
+
+
+class Measurement:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.rows = None # Set by the caller to report how many rows the operation produced
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.name, time.perf_counter() - self.start, self.rows)
+
+
+SEARCH_FIELDS = ("company", "job", "status", "description") # Description last, it has to be read
+TOKEN_RE = re.compile(r"\w+")
+
+
+def matches_filter(app, filter_text, description_of):
+    # Reference substring semantics of the search box; filter_text is already lowercased.
+    # The description is only fetched when the small fields don't match.
+    for field in SEARCH_FIELDS:
+        text = description_of(app) if field == "description" else app.get(field, "")
+        if filter_text in text.lower():
+            return True
+    return False
+
+
+def build_application(date_str, company, job, description, status):
+    # Raises ValueError unless date_str is DD/MM/YYYY
+    dt_obj = datetime.strptime(date_str, "%d/%m/%Y")
+    return {
+        "date": date_str,
+        "company": company,
+        "job": job,
+        "description": description,
+        "status": status,
+        "timestamp": dt_obj.timestamp() # Store timestamp for reliable sorting
+    }
+
+
+def parse_date_range(date_from, date_to):
+    # [from, to) timestamps for DD/MM/YYYY bounds; blank or incomplete dates leave that side open
+    bounds = []
+    for text, days_after in ((date_from, 0), (date_to, 1)):
+        try:
+            dt_obj = datetime.strptime(text.strip(), "%d/%m/%Y")
+        except ValueError:
+            bounds.append(None)
+            continue
+        bounds.append((dt_obj + timedelta(days=days_after)).timestamp()) # "To" includes its whole day
+    return tuple(bounds)
+
+
+# Precomputed key of each sorted index, and which index (and direction) serves each
+# "Sort by" option.
+# String keys are interned: they repeat across records and each index holds one per record.
+INDEX_KEYS = {
+    "timestamp": lambda app: app.get("timestamp", 0),
+    "company": lambda app: sys.intern(app.get("company", "").casefold()),
+    "job": lambda app: sys.intern(app.get("job", "").casefold()),
+    "status": lambda app: sys.intern(app.get("status", "").casefold()),
+}
+SORT_OPTIONS = {
+    "New to Old": ("timestamp", True),
+    "Old to New": ("timestamp", False),
+    "Company A-Z": ("company", False),
+    "Job Title A-Z": ("job", False),
+    "Status A-Z": ("status", False),
+}
+
+
+def bisect_ordered(items, target, key, reverse=False):
+    # bisect_left for a list sorted by key, ascending or (reverse) descending
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        item_key = key(items[mid])
+        if (target < item_key) if reverse else (item_key < target):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class SortedIndex:
+    # Records kept permanently sorted as (key, id) entries with the key computed once,
+    # so changing the sort order never re-sorts and a new record is placed by bisection.
+    # The id breaks ties, giving every record a unique position.
+    def __init__(self, key_func):
+        self.key_func = key_func
+        self.entries = []
+
+    def entry(self, app):
+        return (self.key_func(app), app["id"])
+
+    def build(self, records):
+        self.entries = sorted(self.entry(app) for app in records)
+
+    def add(self, app):
+        insort(self.entries, self.entry(app))
+
+    def add_many(self, apps):
+        # Appending a sorted run and re-sorting is a linear merge for Timsort
+        self.entries += sorted(self.entry(app) for app in apps)
+        self.entries.sort()
+
+    def remove(self, app):
+        # Must be called with the record's indexed content, i.e. before it is edited
+        entry = self.entry(app)
+        i = bisect_left(self.entries, entry)
+        if i < len(self.entries) and self.entries[i] == entry:
+            del self.entries[i]
+
+    def ids(self, low=None, high=None, reverse=False):
+        # Ids in key order, optionally limited to keys in [low, high)
+        start = 0 if low is None else bisect_left(self.entries, (low,))
+        stop = len(self.entries) if high is None else bisect_left(self.entries, (high,))
+        if reverse:
+            return (self.entries[i][1] for i in range(stop - 1, start - 1, -1))
+        return (self.entries[i][1] for i in range(start, stop))
+
+
+class SearchIndex:
+    # Inverted index over the searchable fields. Each distinct lowercased word maps to
+    # a posting list of document numbers, and every word of 3+ characters is also
+    # reachable through its trigrams, so a query word can be matched as a substring
+    # of indexed words without touching the records. For a query that is one word the
+    # candidates are exact, since such a query can only occur inside one indexed word;
+    # anything longer (several words, punctuation) is verified with matches_filter.
+    #
+    # Removing a record only frees its doc number (doc numbers are never reused), so an
+    # edit costs about what an add does instead of a scan of every posting it is in.
+    # Each posting counts its freed docs and is compacted once they make up half of it.
+    def __init__(self, description_of):
+        self.description_of = description_of
+        self.reset()
+
+    def reset(self):
+        self.postings = {} # word -> array of doc numbers, freed ones included
+        self.dead = {} # word -> freed doc numbers still in its posting
+        self.trigrams = {} # trigram -> set of words containing it
+        self.doc_ids = [] # doc number -> app id (None once freed)
+        self.doc_of = {} # str(app id) -> doc number
+
+    def build(self, records):
+        self.reset()
+        for app in records:
+            self.add(app)
+
+    def words_of(self, app):
+        words = set()
+        for field in SEARCH_FIELDS:
+            text = self.description_of(app) if field == "description" else app.get(field, "")
+            words.update(TOKEN_RE.findall(text.lower()))
+        return words
+
+    def add(self, app):
+        doc = len(self.doc_ids)
+        self.doc_ids.append(app["id"])
+        self.doc_of[str(app["id"])] = doc
+        for word in self.words_of(app):
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = array('l')
+                for i in range(len(word) - 2):
+                    self.trigrams.setdefault(word[i:i + 3], set()).add(word)
+            posting.append(doc)
+
+    def remove(self, app):
+        # Must be called with the record's indexed content, i.e. before it is edited
+        doc = self.doc_of.pop(str(app["id"]), None)
+        if doc is None:
+            return
+        self.doc_ids[doc] = None
+        for word in self.words_of(app):
+            posting = self.postings.get(word)
+            if posting is None:
+                continue
+            dead = self.dead.get(word, 0) + 1
+            if dead * 2 < len(posting):
+                self.dead[word] = dead
+                continue
+            # Mostly freed docs: compacting now costs no more than the removals did
+            self.dead.pop(word, None)
+            doc_ids = self.doc_ids
+            posting = array('l', [d for d in posting if doc_ids[d] is not None])
+            if posting:
+                self.postings[word] = posting
+                continue
+            del self.postings[word]
+            for i in range(len(word) - 2):
+                gram = word[i:i + 3]
+                words = self.trigrams.get(gram)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del self.trigrams[gram]
+
+    def words_containing(self, fragment):
+        if len(fragment) < 3:
+            return [word for word in self.postings if fragment in word]
+        grams = [fragment[i:i + 3] for i in range(len(fragment) - 2)]
+        word_sets = [self.trigrams.get(gram) for gram in grams]
+        if not all(word_sets):
+            return []
+        word_sets.sort(key=len)
+        candidates = set(word_sets[0]).intersection(*word_sets[1:])
+        return [word for word in candidates if fragment in word]
+
+    def candidates(self, filter_text):
+        # Returns the set of app ids that may match, or None if the query has no
+        # words to look up (e.g. only punctuation) and a full scan is needed.
+        fragments = TOKEN_RE.findall(filter_text)
+        if not fragments:
+            return None
+        docs = None
+        # Most selective fragment first so later intersections work on small sets
+        for fragment in sorted(set(fragments), key=len, reverse=True):
+            fragment_docs = set()
+            for word in self.words_containing(fragment):
+                fragment_docs.update(self.postings[word])
+            docs = fragment_docs if docs is None else docs & fragment_docs
+            if not docs:
+                return set()
+        doc_ids = self.doc_ids
+        return {doc_ids[doc] for doc in docs if doc_ids[doc] is not None}
+
+
+STATUSES = ("pending", "submitted", "assessment", "interview", "offer", "rejected", "accepted", "withdrawn")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+# description_ref [gen, offset, length, codec] is packed into one int with these widths
+REF_OFFSET_BITS = 40
+REF_LENGTH_BITS = 32
+REF_CODEC_BITS = 8
+
+
+# Per-field conversion between a JSON value and its slot in Application. Encoders
+# return None for values the slot can't hold losslessly.
+def encode_text(value):
+    return sys.intern(value) if type(value) is str else None
+
+
+def encode_status(value):
+    return STATUS_CODES.get(value) if type(value) is str else None
+
+
+def encode_number(value):
+    return value if type(value) in (float, int) else None
+
+
+def encode_id(value):
+    return value if type(value) in (int, str) else None
+
+
+def encode_ref(value):
+    if not (type(value) is list and len(value) == 4 and all(type(part) is int and part >= 0 for part in value)):
+        return None
+    gen, offset, length, codec = value
+    if offset >> REF_OFFSET_BITS or length >> REF_LENGTH_BITS or codec >> REF_CODEC_BITS:
+        return None
+    return (((gen << REF_OFFSET_BITS | offset) << REF_LENGTH_BITS | length) << REF_CODEC_BITS) | codec
+
+
+def decode_ref(packed):
+    codec = packed & ((1 << REF_CODEC_BITS) - 1)
+    packed >>= REF_CODEC_BITS
+    length = packed & ((1 << REF_LENGTH_BITS) - 1)
+    packed >>= REF_LENGTH_BITS
+    return [packed >> REF_OFFSET_BITS, packed & ((1 << REF_OFFSET_BITS) - 1), length, codec]
+
+
+def identity(value):
+    return value
+
+
+# JSON key -> (slot, encode, decode), in the key order records are written with
+FIELD_CODECS = {
+    "date": ("date", encode_text, identity),
+    "company": ("company", encode_text, identity),
+    "job": ("job", encode_text, identity),
+    "status": ("status_code", encode_status, STATUSES.__getitem__),
+    "timestamp": ("timestamp", encode_number, identity),
+    "id": ("id", encode_id, identity),
+    "description_ref": ("packed_ref", encode_ref, decode_ref),
+}
+
+
+class Application:
+    # Compact in-memory record for the JSON backend. A dict per application costs a
+    # hash table plus private copies of strings that repeat across thousands of
+    # records, so records live in slots instead: strings are interned, the status is
+    # an index into STATUSES and the description reference is packed into one int.
+    # It reads and writes like the JSON record dict (same keys, same values), and
+    # to_dict() returns that dict exactly. Values a slot can't hold losslessly (other
+    # types, unknown keys, an inline description) go to the `extra` dict.
+    # A slot holding None means the key is absent or lives in `extra`.
+    __slots__ = ("date", "company", "job", "status_code", "timestamp", "id", "packed_ref", "extra")
+
+    def __init__(self, date=None, company=None, job=None, status_code=None, timestamp=None, id=None,
+                 packed_ref=None, extra=None):
+        # Raw slot values; use from_dict() to build one from a record
+        self.date = date
+        self.company = company
+        self.job = job
+        self.status_code = status_code
+        self.timestamp = timestamp
+        self.id = id
+        self.packed_ref = packed_ref
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, record):
+        app = cls()
+        for key, value in record.items():
+            codec = FIELD_CODECS.get(key)
+            encoded = codec[1](value) if codec is not None else None
+            if encoded is not None:
+                setattr(app, codec[0], encoded)
+            elif app.extra is None:
+                app.extra = {key: value}
+            else:
+                app.extra[key] = value
+        return app
+
+    def slot_values(self):
+        # Raw slot values in __init__ order; the snapshot cache stores records this way
+        return (self.date, self.company, self.job, self.status_code, self.timestamp, self.id,
+                self.packed_ref, self.extra)
+
+    def copy(self):
+        return Application(self.date, self.company, self.job, self.status_code, self.timestamp, self.id,
+                           self.packed_ref, dict(self.extra) if self.extra else None)
+
+    def to_dict(self):
+        record = {}
+        for key, (slot, _, decode) in FIELD_CODECS.items():
+            value = getattr(self, slot)
+            if value is not None:
+                record[key] = decode(value)
+        if self.extra is not None:
+            record.update(self.extra)
+        return record
+
+    def __getitem__(self, key):
+        codec = FIELD_CODECS.get(key)
+        if codec is not None:
+            value = getattr(self, codec[0])
+            if value is not None:
+                return codec[2](value)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        codec = FIELD_CODECS.get(key)
+        if codec is not None:
+            value = getattr(self, codec[0])
+            if value is not None:
+                return codec[2](value)
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __contains__(self, key):
+        codec = FIELD_CODECS.get(key)
+        if codec is not None and getattr(self, codec[0]) is not None:
+            return True
+        return self.extra is not None and key in self.extra
+
+    def __setitem__(self, key, value):
+        codec = FIELD_CODECS.get(key)
+        if codec is not None:
+            encoded = codec[1](value)
+            setattr(self, codec[0], encoded)
+            if encoded is not None:
+                if self.extra is not None and key in self.extra:
+                    self._drop_extra(key)
+                return
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        codec = FIELD_CODECS.get(key)
+        if codec is not None:
+            setattr(self, codec[0], None)
+        if self.extra is not None and key in self.extra:
+            self._drop_extra(key)
+
+    def _drop_extra(self, key):
+        del self.extra[key]
+        if not self.extra:
+            self.extra = None
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def __iter__(self):
+        for key, codec in FIELD_CODECS.items():
+            if getattr(self, codec[0]) is not None:
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def update(self, record):
+        for key, value in record.items():
+            self[key] = value
+
+    def clear(self):
+        for slot in self.__slots__:
+            setattr(self, slot, None)
+
+    def __repr__(self):
+        return f"Application({self.to_dict()!r})"
+
+
+class PipelineStats:
+    # Pipeline statistics kept current by small updates instead of rescans: applications
+    # per status, week and month, per-company response rates, how many applications
+    # have ever been in each status, and time spent in each stage. count() is called
+    # with +1/-1 as a record enters or leaves the set (around edits too), enter()/forget()
+    # start and end its stage tracking, and transition() moves it to a new status.
+    RESPONSES = frozenset(STATUSES) - {"pending", "submitted"} # The company has replied
+    TOP_COMPANIES = 50
+
+    def __init__(self):
+        self.status_counts = {}
+        self.weeks = {} # "2024-W05" -> applications dated that ISO week
+        self.months = {} # "2024-01" -> applications dated that month
+        self.companies = {} # Casefolded name -> [display name, applications, responses]
+        self.entered = {} # App id -> (current status, timestamp it entered that status)
+        self.since_total = {} # Status -> sum of entry timestamps of the apps now in it
+        self.in_stage = {} # Status -> number of tracked apps now in it
+        self.stage_time = {} # Status -> [seconds spent in completed stays, completed stays]
+        self.stays = {} # App id -> [(status, seconds)] completed stays, undone on removal
+        self.visited = {} # App id -> bitmask over STATUSES of every status it has had
+        self.reached = {} # Status -> apps that have ever had it
+
+    def build(self, records, history):
+        # history: status-history entries in the order they were logged
+        steps_by_id = {}
+        for entry in history:
+            steps_by_id.setdefault(str(entry.get("id")), []).append(entry)
+        for app in records:
+            self.count(app, 1)
+            steps = steps_by_id.get(str(app["id"]))
+            if not steps:
+                self.enter(app)
+                continue
+            # Its history starts at the status it was created with
+            self.enter(app, steps[0].get("from"))
+            for step in steps:
+                self.transition(app["id"], step.get("to"), step.get("at", 0))
+            if self.entered[str(app["id"])][0] != app.get("status"): # Changed without a log entry
+                self.transition(app["id"], app.get("status"), self.entered[str(app["id"])][1])
+
+    def count(self, app, delta):
+        def bump(counts, key):
+            counts[key] = counts.get(key, 0) + delta
+            if not counts[key]:
+                del counts[key]
+        status = app.get("status", "")
+        bump(self.status_counts, status)
+        try:
+            day = date.fromtimestamp(app.get("timestamp", 0))
+        except (OverflowError, OSError, ValueError):
+            day = None
+        if day is not None:
+            year, week, _ = day.isocalendar()
+            bump(self.weeks, f"{year}-W{week:02d}")
+            bump(self.months, f"{day.year}-{day.month:02d}")
+        company = app.get("company", "")
+        entry = self.companies.setdefault(company.casefold(), [company, 0, 0])
+        entry[1] += delta
+        entry[2] += delta if status in self.RESPONSES else 0
+        if not entry[1]:
+            del self.companies[company.casefold()]
+
+    def enter(self, app, status=None):
+        # Start tracking app in status (its current one by default) from its application date
+        status = app.get("status", "") if status is None else status
+        self._set_stage(str(app["id"]), status, app.get("timestamp", 0))
+
+    def forget(self, app):
+        app_id = str(app["id"])
+        status, since = self.entered.pop(app_id)
+        self._leave(status, since)
+        for status, seconds in self.stays.pop(app_id, ()):
+            self.stage_time[status][0] -= seconds
+            self.stage_time[status][1] -= 1
+        mask = self.visited.pop(app_id, 0)
+        for code, status in enumerate(STATUSES):
+            if mask >> code & 1:
+                self.reached[status] -= 1
+
+    def transition(self, app_id, new_status, at):
+        app_id = str(app_id)
+        status, since = self.entered[app_id]
+        self._leave(status, since)
+        seconds = max(0, at - since)
+        totals = self.stage_time.setdefault(status, [0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+        self.stays.setdefault(app_id, []).append((status, seconds))
+        self._set_stage(app_id, new_status, at)
+
+    def _set_stage(self, app_id, status, since):
+        self.entered[app_id] = (status, since)
+        self.since_total[status] = self.since_total.get(status, 0) + since
+        self.in_stage[status] = self.in_stage.get(status, 0) + 1
+        code = STATUS_CODES.get(status)
+        mask = self.visited.get(app_id, 0)
+        if code is not None and not mask >> code & 1:
+            self.visited[app_id] = mask | 1 << code
+            self.reached[status] = self.reached.get(status, 0) + 1
+
+    def _leave(self, status, since):
+        self.since_total[status] -= since
+        self.in_stage[status] -= 1
+
+    def stages(self, now):
+        # (status, now in it, ever reached, average days of completed stays, average days so far)
+        # in pipeline order, then any statuses outside STATUSES
+        day = 24 * 60 * 60
+        rows = []
+        others = sorted(set(self.status_counts) - set(STATUSES))
+        for status in STATUSES + tuple(others):
+            seconds, stays = self.stage_time.get(status, (0, 0))
+            current = self.in_stage.get(status, 0)
+            rows.append((status, self.status_counts.get(status, 0), self.reached.get(status, 0),
+                         seconds / stays / day if stays else None,
+                         (now - self.since_total[status] / current) / day if current else None))
+        return rows
+
+    def recent(self, counts, limit=12):
+        # The newest `limit` periods of weeks or months, newest first
+        return heapq.nlargest(limit, counts.items())
+
+    def top_companies(self):
+        # (name, applications, responses, response rate), most applications first
+        top = heapq.nlargest(self.TOP_COMPANIES, self.companies.values(), key=lambda entry: (entry[1], entry[0]))
+        return [(name, total, responses, responses / total) for name, total, responses in top]
+
+
+class ApplicationRepository:
+    # In-memory set of applications: a dict from id to record, a monotonic id counter,
+    # and the search and sorted indexes, all kept in sync on add, edit and remove so
+    # nothing has to scan or re-sort the whole set.
+    #
+    # This is the JSON storage backend. SqliteRepository implements the same methods
+    # (load, save, get, add, add_many, update, remove, description, matches, sort_entry, query,
+    # iter_query, build_search_index, statistics, check_external_changes, take_external_changes,
+    # records) and
+    # the GUI only talks to the repository through them.
+    paged_results = False # query() returns a plain list
+    SMALL_CANDIDATE_RATIO = 8 # Sort candidates directly when fewer than 1/8 of all records
+    BATCH_SIZE = 5000 # Records per write when migrating or importing in bulk
+
+    def __init__(self, store, descriptions, background=False, cache=None, history=None, lock=None):
+        self.store = store
+        self.descriptions = descriptions
+        self.cache = cache # Optional SnapshotCache
+        self.history = history # Optional StatusHistory
+        self.lock = lock # Optional FileLock shared with other instances
+        self.external_changes = {} # str(id) -> record before another instance changed it (None if new)
+        self.cache_stale = False # Edited since the cache was last written
+        self.cache_ok = True # False while the loaded snapshot was unreadable
+        # With background=True all file writes go through a BackgroundWriter thread;
+        # otherwise they happen inline (headless use, migration)
+        self.writer = BackgroundWriter(self.write) if background else None
+        if self.writer is not None:
+            self.descriptions.submit = lambda blobs: self.writer.submit("blob", blobs)
+        self.by_id = {}
+        self.next_id = 1
+        # Indexing descriptions means reading all of them, so the search index is built
+        # after loading, a batch at a time (build_search_index); searches scan the
+        # records until it is ready. Once started, every change is mirrored into it.
+        self.search_index = SearchIndex(self.description)
+        self.search_index_started = False
+        self.search_index_ready = False
+        self.sort_indexes = {name: SortedIndex(key_func) for name, key_func in INDEX_KEYS.items()}
+        # Statistics are likewise built when first shown, then kept current
+        self.stats = PipelineStats()
+        self.stats_ready = False
+
+    def load(self, snapshot_ok=True):
+        # Locked so another instance can't write halfway through the read
+        with self._locked(catch_up=False):
+            self._load(snapshot_ok)
+
+    def _load(self, snapshot_ok):
+        cached = self.cache.load() if self.cache is not None and snapshot_ok else None
+        backfilled = False
+        if cached is not None: # Already normalized and with the journal applied
+            records = cached["records"]
+            self.store.snapshot_size, self.store.journal_size = cached["key"][0], cached["key"][3]
+            self.store.seen_snapshot = self.store.snapshot_signature()
+        else:
+            records = self.store.load_snapshot() if snapshot_ok else []
+            # Ensure all applications have a unique ID (for backward compatibility). Records
+            # are keyed by id, so rows without one, or repeating one, get fresh ids past the
+            # highest existing one rather than replacing another record.
+            taken = {str(app["id"]) for app in records if "id" in app}
+            free_id = max((app["id"] for app in records if isinstance(app.get("id"), int)), default=-1) + 1
+            seen = set()
+            for app in records:
+                if "id" not in app or str(app["id"]) in seen:
+                    while str(free_id) in taken:
+                        free_id += 1
+                    app["id"] = free_id
+                    taken.add(str(free_id))
+                    backfilled = True
+                seen.add(str(app["id"]))
+                if "timestamp" not in app: # Add timestamp if missing for sorting
+                    try:
+                        # Attempt to parse date, default to now if invalid
+                        dt_obj = datetime.strptime(app["date"], "%d/%m/%Y")
+                    except ValueError:
+                        dt_obj = datetime.now()
+                    app["timestamp"] = dt_obj.timestamp()
+                    backfilled = True
+            # Journal entries reference ids, so replay only after the snapshot has them
+            records = self.store.replay_journal(records)
+            for i, app in enumerate(records): # Swapped one at a time to keep the peak down
+                records[i] = Application.from_dict(app)
+        # Move descriptions still stored inline (older files) out to the blob store
+        migrated = False
+        inline = []
+        for app in records:
+            if "description" in app:
+                inline.append(app)
+                migrated = True
+            elif "description_ref" in app:
+                self.descriptions.track(app["description_ref"])
+        for start in range(0, len(inline), self.BATCH_SIZE):
+            self._store_descriptions(inline[start:start + self.BATCH_SIZE])
+        self.by_id = {str(app["id"]): app for app in records}
+        numeric_ids = [app["id"] for app in records if isinstance(app["id"], int)]
+        self.next_id = max(numeric_ids, default=0) + 1
+        self.search_index.reset()
+        self.search_index_started = False
+        self.search_index_ready = False
+        self.stats = PipelineStats()
+        self.stats_ready = False
+        self.external_changes = {}
+        for name, index in self.sort_indexes.items():
+            if cached is not None:
+                index.entries = cached["indexes"][name]
+            else:
+                index.build(records)
+        self.cache_ok = snapshot_ok
+        self.cache_stale = False
+        if backfilled or migrated or self.store.needs_compaction():
+            self.save() # Persist backfilled ids so later journal entries stay valid
+        elif cached is None and snapshot_ok and self.cache is not None:
+            # Rebuild the missing or stale cache for the next start, off the loading path
+            self._write("cache", self._cache_state())
+
+    @property
+    def records(self):
+        return list(self.by_id.values())
+
+    @contextmanager
+    def _locked(self, catch_up=True):
+        # Every change holds the data file's lock, so other instances wait for it. If
+        # this takes the lock afresh, what they wrote in the meantime is merged first,
+        # so ids, blob offsets and compactions are based on the files as they are now.
+        # The lock is let go once the change's writes, possibly still queued on the
+        # background writer, are on disk.
+        if self.lock is None:
+            yield
+            return
+        taken = self.lock.acquire()
+        try:
+            if taken and catch_up:
+                self._catch_up()
+            yield
+        finally:
+            self._write("unlock", None)
+
+    def check_external_changes(self):
+        # Polled by the GUI: two stats, unless another instance has written since. Then
+        # the records it changed are merged in and True is returned; the GUI takes the
+        # previous versions from take_external_changes().
+        if self.lock is None or self.lock.held or not self.store.changed_on_disk():
+            return False # While the lock is held nobody else can have written
+        if self.lock.acquire(blocking=False) is None:
+            return False # Another instance is writing; look again on the next poll
+        try:
+            self._catch_up()
+        finally:
+            self._write("unlock", None)
+        return bool(self.external_changes)
+
+    def take_external_changes(self):
+        # {str(id): record as it was before (None if added)} for every record merged
+        # from other instances since the last call
+        changes, self.external_changes = self.external_changes, {}
+        return changes
+
+    def _catch_up(self):
+        # Runs with the lock freshly taken, when all of this instance's writes are on
+        # disk. A journal that only grew is read from where we left off; anything else
+        # (another instance compacted, or the file was replaced, e.g. by a sync) is
+        # compared with the records by id.
+        store = self.store
+        snapshot, journal_size = store.snapshot_signature(), store.journal_disk_size()
+        if snapshot == store.seen_snapshot and journal_size == store.journal_size:
+            return
+        self.descriptions.refresh() # Blob files may have grown or been replaced too
+        if snapshot == store.seen_snapshot and journal_size > store.journal_size:
+            changes = {}
+            for entry in store.read_journal(store.journal_size):
+                if entry.get("op") == "put":
+                    changes[str(entry["record"].get("id"))] = entry["record"]
+                elif entry.get("op") == "delete":
+                    changes.update((str(key), None) for key in entry["ids"])
+        else:
+            try:
+                records = store.replay_journal(store.load_snapshot())
+            except ValueError: # Unreadable, e.g. half synced; keep ours until it changes again
+                store.seen_snapshot, store.journal_size = snapshot, journal_size
+                return
+            changes = {str(app["id"]): app for app in records if "id" in app}
+            changes.update((key, None) for key in self.by_id if key not in changes)
+        self._merge(changes)
+
+    def _merge(self, changes):
+        # Applies {str(id): record, or None if deleted} read from disk, skipping records
+        # that already match
+        touched = []
+        changed = False
+        for key, record in changes.items():
+            app = self.by_id.get(key)
+            if record is not None:
+                record = Application.from_dict(record)
+                if app is not None and app.to_dict() == record.to_dict():
+                    continue
+            elif app is None:
+                continue
+            self.external_changes.setdefault(key, app.copy() if app is not None else None)
+            changed = True
+            self.stats = PipelineStats() # Rebuilt from the shared history log when next shown
+            self.stats_ready = False
+            if app is not None:
+                self._unindex(app)
+                if "description_ref" in app:
+                    self.descriptions.discard(app["description_ref"])
+            if record is None:
+                del self.by_id[key]
+            elif app is None:
+                touched.append(record)
+                self.by_id[key] = record
+            else:
+                app.clear() # In place, as in update()
+                app.update(record)
+                touched.append(app)
+        if not changed:
+            return
+        self.cache_stale = True
+        inline = [app for app in touched if "description" in app] # Written by an older version
+        for app in touched:
+            if "description_ref" in app:
+                self.descriptions.track(app["description_ref"])
+            self._index(app)
+            if isinstance(app["id"], int) and app["id"] >= self.next_id:
+                self.next_id = app["id"] + 1
+        if inline:
+            self._store_descriptions(inline)
+            self.save()
+
+    def save(self):
+        # Full rewrite; normal edits only append to the journal
+        with self._locked():
+            records = self.records
+            if self.descriptions.needs_rewrite():
+                # Mostly superseded blobs: copy the live descriptions into a new generation
+                self.descriptions.start_generation()
+                for app in records:
+                    if "description_ref" in app:
+                        app["description_ref"] = self.descriptions.copy(app["description_ref"])
+            keep = self._referenced_generations()
+            self.descriptions.release(keep)
+            self.store.journal_size = 0 # Everything queued so far is part of this snapshot
+            self.cache_stale = False # The cache is rewritten along with the snapshot
+            self.cache_ok = True
+            self._write("compact", self._cache_state(records) + (keep,))
+
+    def _cache_state(self, records=None):
+        # Copies, so later edits can't change the records while they are being written
+        records = [app.copy() for app in (self.records if records is None else records)]
+        return records, {name: list(index.entries) for name, index in self.sort_indexes.items()}
+
+    def write(self, kind, payloads):
+        # Performs queued writes; runs on the writer thread when there is one
+        if kind == "blob":
+            self.descriptions.write_blobs([blob for blobs in payloads for blob in blobs])
+        elif kind == "journal":
+            self.store.write_lines(payloads)
+        elif kind == "compact":
+            records, indexes, keep = payloads[-1] # Only the newest snapshot matters
+            self.store.compact(records)
+            # Only once the journal is gone can no entry point at an older generation
+            self.descriptions.drop_generations(keep)
+            if self.cache is not None:
+                self.cache.write(records, indexes)
+        elif kind == "cache":
+            self.cache.write(*payloads[-1])
+        elif kind == "history":
+            self.history.write_lines(payloads)
+        elif kind == "unlock":
+            for _ in payloads: # Queued after the writes of the change that held it
+                self.lock.release()
+
+    def _write(self, kind, payload):
+        if self.writer is None:
+            self.write(kind, [payload])
+        else:
+            self.writer.submit(kind, payload)
+
+    def flush(self):
+        # Blocks until every queued write is on disk
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.descriptions.submit = self.descriptions.write_blobs
+        if self.cache is not None and self.cache_stale and self.cache_ok:
+            # Everything is on disk now, so the next start can skip the journal replay.
+            # Locked and caught up, so the cache can't miss another instance's changes.
+            with self._locked():
+                self.cache.write(self.records, {name: index.entries for name, index in self.sort_indexes.items()})
+            self.cache_stale = False
+
+    def _referenced_generations(self):
+        return {app["description_ref"][0] for app in self.by_id.values() if "description_ref" in app}
+
+    def description(self, app):
+        ref = app.get("description_ref")
+        if ref is None:
+            return app.get("description", "")
+        return self.descriptions.get(ref)
+
+    def _store_description(self, app):
+        self._store_descriptions([app])
+
+    def _store_descriptions(self, apps):
+        # Moves inline descriptions to the blob store with one write for all of them
+        apps = [app for app in apps if "description" in app]
+        refs = self.descriptions.put_many([app.pop("description") for app in apps])
+        for app, ref in zip(apps, refs):
+            app["description_ref"] = ref
+
+    def get(self, app_id):
+        return self.by_id.get(str(app_id))
+
+    def add(self, app):
+        with self._locked():
+            app = Application.from_dict(app)
+            app["id"] = self.next_id
+            self.next_id += 1
+            self._store_description(app)
+            self.by_id[str(app["id"])] = app
+            self._index(app)
+            if self.stats_ready:
+                self.stats.enter(app)
+            self._persist_put(app)
+            return app
+
+    def add_many(self, apps):
+        # Bulk add: ids are assigned as one block, the descriptions and the journal
+        # entries go out as one write each, and the sorted indexes are merged once.
+        # Compaction is left to the caller's save() so a multi-batch import rewrites
+        # the snapshot once rather than every time the journal doubles.
+        with self._locked():
+            apps = [Application.from_dict(app) for app in apps]
+            for app in apps:
+                app["id"] = self.next_id
+                self.next_id += 1
+            self._store_descriptions(apps)
+            for app in apps:
+                self.by_id[str(app["id"])] = app
+                if self.search_index_started:
+                    self.search_index.add(app)
+                if self.stats_ready:
+                    self.stats.count(app, 1)
+                    self.stats.enter(app)
+            for index in self.sort_indexes.values():
+                index.add_many(apps)
+            if apps:
+                self.cache_stale = True
+                self._write("journal", b"".join(self.store.put_line(app) for app in apps))
+            return apps
+
+    def update(self, app_id, fields):
+        with self._locked():
+            app = self.get(app_id)
+            if app is None:
+                return None
+            self._unindex(app) # Drop the old content before overwriting it
+            old_ref = app.get("description_ref")
+            old_status = app.get("status")
+            # Update in place so references held elsewhere stay valid
+            original_id = app["id"]
+            app.clear()
+            app.update(fields)
+            app["id"] = original_id # Preserve original ID
+            self._store_description(app)
+            if old_ref is not None:
+                self.descriptions.discard(old_ref)
+            self._index(app)
+            if app.get("status") != old_status:
+                self._log_transition(app, old_status)
+            self._persist_put(app)
+            return app
+
+    def _log_transition(self, app, old_status):
+        at = time.time()
+        if self.history is not None:
+            self._write("history", self.history.line(app["id"], old_status, app.get("status"), at))
+        if self.stats_ready:
+            self.stats.transition(app["id"], app.get("status"), at)
+
+    def statistics(self):
+        # PipelineStats for the current records, built on first use
+        if not self.stats_ready:
+            self.flush() # The history log must include this session's status changes
+            self.stats.build(self.by_id.values(), self.history.read() if self.history is not None else [])
+            self.stats_ready = True
+        return self.stats
+
+    def remove(self, app_ids):
+        with self._locked():
+            removed = [self.by_id.pop(str(app_id)) for app_id in app_ids if str(app_id) in self.by_id]
+            if not removed:
+                return []
+            for app in removed:
+                self._unindex(app)
+                if self.stats_ready:
+                    self.stats.forget(app)
+                if "description_ref" in app:
+                    self.descriptions.discard(app["description_ref"])
+            self.cache_stale = True
+            removed_ids = [app["id"] for app in removed]
+            self._write("journal", self.store.delete_line(removed_ids))
+            if self.history is not None: # A later record reusing an id starts a fresh history
+                self._write("history", self.history.removal_line(removed_ids, time.time()))
+            self._compact_if_needed()
+            return removed
+
+    def _index(self, app):
+        if self.search_index_started:
+            self.search_index.add(app)
+        if self.stats_ready:
+            self.stats.count(app, 1)
+        for index in self.sort_indexes.values():
+            index.add(app)
+
+    def _unindex(self, app):
+        if self.search_index_started:
+            self.search_index.remove(app)
+        if self.stats_ready:
+            self.stats.count(app, -1)
+        for index in self.sort_indexes.values():
+            index.remove(app)
+
+    def matches(self, app, filter_text, date_from=None, date_to=None):
+        # filter_text is lowercased; the date range is [date_from, date_to) in timestamps
+        if date_from is not None and app.get("timestamp", 0) < date_from:
+            return False
+        if date_to is not None and app.get("timestamp", 0) >= date_to:
+            return False
+        return not filter_text or matches_filter(app, filter_text, self.description)
+
+    def sort_entry(self, sort_option, app):
+        # Position key of app under sort_option, and whether that order is descending
+        index_name, reverse = SORT_OPTIONS[sort_option]
+        return self.sort_indexes[index_name].entry(app), reverse
+
+    def query(self, filter_text="", sort_option="New to Old", date_from=None, date_to=None):
+        return list(self.iter_query(filter_text, sort_option, date_from, date_to))
+
+    def iter_query(self, filter_text="", sort_option="New to Old", date_from=None, date_to=None, within=None):
+        # Lazily yields records matching filter_text with a timestamp in [date_from, date_to)
+        # (either bound may be None), in sort_option order. `within` narrows the scan to an
+        # earlier result list in the same order, which is valid when the new query
+        # contains the old one and the date range is unchanged.
+        filter_text = filter_text.lower()
+        if within is not None:
+            return (app for app in within if self.matches(app, filter_text, date_from, date_to))
+
+        index_name, reverse = SORT_OPTIONS[sort_option]
+        index = self.sort_indexes[index_name]
+        # Until the search index is ready, matches() below scans every record
+        candidate_ids = self.search_index.candidates(filter_text) if filter_text and self.search_index_ready else None
+        has_range = date_from is not None or date_to is not None
+        if has_range and index_name == "timestamp":
+            ordered_ids = index.ids(date_from, date_to, reverse) # The range is a slice of this index
+        else:
+            if has_range:
+                range_ids = set(self.sort_indexes["timestamp"].ids(date_from, date_to))
+                candidate_ids = range_ids if candidate_ids is None else candidate_ids & range_ids
+            if candidate_ids is not None and len(candidate_ids) * self.SMALL_CANDIDATE_RATIO < len(self.by_id):
+                # Cheaper to order the few candidates than to walk the whole index
+                ordered_ids = sorted(candidate_ids, key=lambda app_id: index.entry(self.by_id[str(app_id)]),
+                                     reverse=reverse)
+                candidate_ids = None
+            else:
+                ordered_ids = index.ids(reverse=reverse)
+        if candidate_ids is not None:
+            ordered_ids = (app_id for app_id in ordered_ids if app_id in candidate_ids)
+        by_id = self.by_id
+        if filter_text and self.search_index_ready and TOKEN_RE.fullmatch(filter_text):
+            # Exact candidates, already within the date range: nothing to verify, so no
+            # description has to be read and decompressed
+            return (by_id[str(app_id)] for app_id in ordered_ids)
+        return (app for app in (by_id[str(app_id)] for app_id in ordered_ids)
+                if self.matches(app, filter_text, date_from, date_to))
+
+    def build_search_index(self, batch_size=500):
+        # Generator that indexes the records batch_size at a time, yielding the number
+        # done, so the GUI can spread the work over the event loop. Records added,
+        # edited or removed meanwhile are indexed as they change and skipped here.
+        if self.search_index_started:
+            return
+        self.search_index.reset()
+        self.search_index_started = True
+        records = self.records
+        doc_of = self.search_index.doc_of
+        for start in range(0, len(records), batch_size):
+            if self.search_index.doc_of is not doc_of: # Reloaded meanwhile; that load starts over
+                return
+            for app in records[start:start + batch_size]:
+                key = str(app["id"])
+                if self.by_id.get(key) is app and key not in doc_of:
+                    self.search_index.add(app)
+            yield min(start + batch_size, len(records))
+        self.search_index_ready = True
+
+    def _persist_put(self, app):
+        self.cache_stale = True
+        self._write("journal", self.store.put_line(app))
+        self._compact_if_needed()
+
+    def _compact_if_needed(self):
+        if self.store.needs_compaction():
+            self.save()
+
+
+class PagedResult:
+    # A query result that is read from SQLite a page at a time (LIMIT/OFFSET) as rows
+    # are shown, instead of being materialized up front.
+    PAGE_SIZE = 200
+    MAX_PAGES = 20 # Pages kept in memory before the least recently fetched is dropped
+
+    def __init__(self, repo, select_sql, params, count):
+        self.repo = repo
+        self.select_sql = select_sql
+        self.params = params
+        self.count = count
+        self.pages = {}
+        self.ids = PagedIds(self)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        page_number, offset = divmod(position, self.PAGE_SIZE)
+        page = self.pages.get(page_number)
+        if page is None:
+            if len(self.pages) >= self.MAX_PAGES:
+                del self.pages[next(iter(self.pages))]
+            page = self.pages[page_number] = self.repo.fetch_page(
+                self.select_sql, self.params, self.PAGE_SIZE, page_number * self.PAGE_SIZE)
+        return page[offset]
+
+    def __iter__(self):
+        return (self[i] for i in range(self.count))
+
+
+class PagedIds:
+    # Sequence of the ids in a PagedResult, usable wherever the GUI expects view_ids
+    def __init__(self, result):
+        self.result = result
+
+    def __len__(self):
+        return len(self.result)
+
+    def __getitem__(self, position):
+        return self.result[position]["id"]
+
+    def __iter__(self):
+        return (app["id"] for app in self.result)
+
+
+class SqliteRepository:
+    # SQLite storage backend (WAL mode). Small fields live in an indexed table with
+    # precomputed casefolded sort keys, descriptions in an FTS5 trigram table that serves
+    # substring search, and queries are paged into the view with LIMIT/OFFSET rather than
+    # loading every record. Fields the schema doesn't know are kept as JSON in "extra"
+    # so records round-trip unchanged.
+    paged_results = True # query() returns a PagedResult
+    writer = None # Writes are small WAL transactions and stay inline, so reads see them at once
+    COLUMNS = ("id", "date", "company", "job", "status", "timestamp")
+    SORT_COLUMNS = {"timestamp": "timestamp", "company": "company_key", "job": "job_key", "status": "status_key"}
+    CACHE_SIZE = 5000 # Records kept by get() before the cache is reset
+
+    def __init__(self, db_path, migrate_from=None):
+        self.db_path = db_path
+        self.migrate_from = migrate_from # JSON data file imported on first use
+        self.conn = None
+        self.data_version = None # PRAGMA data_version as of the last external change check
+        self.cache = {}
+        self.stats = PipelineStats()
+        self.stats_ready = False
+
+    def load(self, snapshot_ok=True):
+        # Opened on the loader thread and used on the Tk thread afterwards, never concurrently
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # Search uses Python's lower() so results match the JSON backend for non-ASCII text
+        self.conn.create_function("lower", 1, lambda text: text.lower() if text is not None else None,
+                                  deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS applications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    job TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    company_key TEXT NOT NULL,
+                    job_key TEXT NOT NULL,
+                    status_key TEXT NOT NULL,
+                    extra TEXT
+                );
+                CREATE INDEX IF NOT EXISTS applications_timestamp ON applications (timestamp, id);
+                CREATE INDEX IF NOT EXISTS applications_company ON applications (company_key, id);
+                CREATE INDEX IF NOT EXISTS applications_job ON applications (job_key, id);
+                CREATE INDEX IF NOT EXISTS applications_status ON applications (status_key, id);
+                CREATE VIRTUAL TABLE IF NOT EXISTS descriptions USING fts5(description, tokenize='trigram');
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS status_history (id INTEGER NOT NULL, from_status TEXT,
+                                                           to_status TEXT, at REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS status_history_id ON status_history (id);
+            """)
+        self.stats = PipelineStats()
+        self.stats_ready = False
+        migrated = self.conn.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone()
+        # A JSON file that was never compacted may only have its journal so far
+        if (migrated is None and snapshot_ok and self.migrate_from
+                and any(os.path.exists(path) for path in (self.migrate_from, self.migrate_from + ".journal"))):
+            self.migrate_json(self.migrate_from)
+        self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def migrate_json(self, data_file):
+        # One-shot import of a JSON data file. Loading it through the JSON backend applies
+        # the same id/timestamp backfill for legacy records and replays its journal.
+        source = ApplicationRepository(JournalStore(data_file), DescriptionStore(data_file),
+                                       lock=FileLock(data_file + ".lock"))
+        source.load()
+        with self.conn:
+            for app in source.records:
+                app = dict(app)
+                app["description"] = source.description(app)
+                app.pop("description_ref", None)
+                self._insert(app)
+            self.conn.executemany("INSERT INTO status_history (id, from_status, to_status, at) VALUES (?, ?, ?, ?)",
+                                  [(entry.get("id"), entry.get("from"), entry.get("to"), entry.get("at", 0))
+                                   for entry in StatusHistory(data_file).read()])
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)",
+                              (os.path.abspath(data_file),))
+        self.cache.clear()
+
+    def save(self):
+        self.conn.commit()
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def flush(self):
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def check_external_changes(self):
+        # SQLite already locks and commits atomically across processes; data_version
+        # moves when another connection commits, though not which rows changed
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self.data_version:
+            return False
+        self.data_version = version
+        self.cache.clear()
+        self.stats = PipelineStats() # Rebuilt from scratch when next shown
+        self.stats_ready = False
+        return True
+
+    def take_external_changes(self):
+        return {} # Paged views re-query on any change instead
+
+    @property
+    def records(self):
+        return [self._record(row) for row in self.conn.execute(
+            "SELECT * FROM applications ORDER BY id")]
+
+    @property
+    def next_id(self):
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'applications'").fetchone()
+        return (row[0] if row else 0) + 1
+
+    def _record(self, row):
+        app = {column: row[column] for column in self.COLUMNS}
+        if row["extra"]:
+            app.update(json.loads(row["extra"]))
+        return app
+
+    def _row_values(self, app):
+        extra = {key: value for key, value in app.items()
+                 if key not in self.COLUMNS and key not in ("description", "description_ref")}
+        return (app["date"], app["company"], app["job"], app["status"], app.get("timestamp", 0),
+                INDEX_KEYS["company"](app), INDEX_KEYS["job"](app), INDEX_KEYS["status"](app),
+                json.dumps(extra) if extra else None)
+
+    def _insert(self, app):
+        try:
+            app_id = int(app.get("id"))
+        except (TypeError, ValueError):
+            app_id = None # Let SQLite assign one
+        cursor = self.conn.execute(
+            "INSERT INTO applications (id, date, company, job, status, timestamp, company_key, job_key,"
+            " status_key, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (app_id,) + self._row_values(app))
+        app["id"] = cursor.lastrowid
+        self.conn.execute("INSERT INTO descriptions (rowid, description) VALUES (?, ?)",
+                          (app["id"], app.get("description", "")))
+        return app
+
+    def get(self, app_id):
+        app = self.cache.get(str(app_id))
+        if app is not None:
+            return app
+        try:
+            row = self.conn.execute("SELECT * FROM applications WHERE id = ?", (int(app_id),)).fetchone()
+        except (TypeError, ValueError):
+            return None
+        if row is None:
+            return None
+        app = self.cache[str(app_id)] = self._record(row)
+        return app
+
+    def add(self, app):
+        app.pop("id", None)
+        with self.conn:
+            self._insert(app)
+        app.pop("description", None)
+        self.cache.clear()
+        app = self.get(app["id"])
+        if self.stats_ready:
+            self.stats.count(app, 1)
+            self.stats.enter(app)
+        return app
+
+    def add_many(self, apps):
+        # Bulk add in a single transaction
+        added = []
+        with self.conn:
+            for app in apps:
+                app.pop("id", None)
+                self._insert(app)
+                app.pop("description", None)
+                added.append(app)
+        self.cache.clear()
+        if self.stats_ready:
+            for app in added:
+                self.stats.count(app, 1)
+                self.stats.enter(app)
+        return added
+
+    def update(self, app_id, fields):
+        app = self.get(app_id)
+        if app is None:
+            return None
+        at = time.time()
+        with self.conn:
+            self.conn.execute(
+                "UPDATE applications SET date = ?, company = ?, job = ?, status = ?, timestamp = ?,"
+                " company_key = ?, job_key = ?, status_key = ?, extra = ? WHERE id = ?",
+                self._row_values(fields) + (app["id"],))
+            self.conn.execute("UPDATE descriptions SET description = ? WHERE rowid = ?",
+                              (fields.get("description", ""), app["id"]))
+            if fields.get("status") != app.get("status"):
+                self.conn.execute("INSERT INTO status_history (id, from_status, to_status, at) VALUES (?, ?, ?, ?)",
+                                  (app["id"], app.get("status"), fields.get("status"), at))
+        self.cache.clear()
+        updated = self.get(app["id"])
+        if self.stats_ready:
+            self.stats.count(app, -1)
+            self.stats.count(updated, 1)
+            if updated.get("status") != app.get("status"):
+                self.stats.transition(app["id"], updated.get("status"), at)
+        return updated
+
+    def remove(self, app_ids):
+        removed = [app for app in map(self.get, app_ids) if app is not None]
+        if removed:
+            with self.conn:
+                for app in removed:
+                    self.conn.execute("DELETE FROM applications WHERE id = ?", (app["id"],))
+                    self.conn.execute("DELETE FROM descriptions WHERE rowid = ?", (app["id"],))
+                    self.conn.execute("DELETE FROM status_history WHERE id = ?", (app["id"],))
+            self.cache.clear()
+            if self.stats_ready:
+                for app in removed:
+                    self.stats.count(app, -1)
+                    self.stats.forget(app)
+        return removed
+
+    def statistics(self):
+        # PipelineStats for the current records, built with one scan on first use
+        if not self.stats_ready:
+            history = [{"id": row["id"], "from": row["from_status"], "to": row["to_status"], "at": row["at"]}
+                       for row in self.conn.execute("SELECT * FROM status_history ORDER BY rowid")]
+            self.stats.build(self.records, history)
+            self.stats_ready = True
+        return self.stats
+
+    def description(self, app):
+        row = self.conn.execute("SELECT description FROM descriptions WHERE rowid = ?", (app["id"],)).fetchone()
+        return row[0] if row else ""
+
+    def matches(self, app, filter_text, date_from=None, date_to=None):
+        if date_from is not None and app.get("timestamp", 0) < date_from:
+            return False
+        if date_to is not None and app.get("timestamp", 0) >= date_to:
+            return False
+        return not filter_text or matches_filter(app, filter_text, self.description)
+
+    def sort_entry(self, sort_option, app):
+        index_name, reverse = SORT_OPTIONS[sort_option]
+        return (INDEX_KEYS[index_name](app), app["id"]), reverse
+
+    def _where(self, filter_text, date_from, date_to):
+        clauses, params = [], []
+        if date_from is not None:
+            clauses.append("timestamp >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append("timestamp < ?")
+            params.append(date_to)
+        if filter_text:
+            if len(filter_text) >= 3:
+                # A quoted phrase against the trigram index is a case-insensitive substring match
+                description_clause = "id IN (SELECT rowid FROM descriptions WHERE descriptions MATCH ?)"
+                description_param = '"' + filter_text.replace('"', '""') + '"'
+            else: # Too short for trigrams
+                description_clause = "id IN (SELECT rowid FROM descriptions WHERE instr(lower(description), ?))"
+                description_param = filter_text
+            clauses.append("(instr(lower(company), ?) OR instr(lower(job), ?) OR instr(lower(status), ?)"
+                           f" OR {description_clause})")
+            params += [filter_text] * 3 + [description_param]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, filter_text="", sort_option="New to Old", date_from=None, date_to=None):
+        filter_text = filter_text.lower()
+        where, params = self._where(filter_text, date_from, date_to)
+        index_name, reverse = SORT_OPTIONS[sort_option]
+        direction = " DESC" if reverse else ""
+        order = f" ORDER BY {self.SORT_COLUMNS[index_name]}{direction}, id{direction}"
+        count = self.conn.execute("SELECT COUNT(*) FROM applications" + where, params).fetchone()[0]
+        return PagedResult(self, "SELECT * FROM applications" + where + order, params, count)
+
+    def iter_query(self, filter_text="", sort_option="New to Old", date_from=None, date_to=None, within=None):
+        # Results are always paged from the database; narrowing an earlier result doesn't apply
+        return iter(self.query(filter_text, sort_option, date_from, date_to))
+
+    def build_search_index(self, batch_size=500):
+        # The full-text table is kept current by the database, so there is nothing to build
+        return iter(())
+
+    def fetch_page(self, select_sql, params, limit, offset):
+        if len(self.cache) > self.CACHE_SIZE:
+            self.cache.clear()
+        rows = self.conn.execute(select_sql + " LIMIT ? OFFSET ?", list(params) + [limit, offset])
+        page = [self._record(row) for row in rows]
+        for app in page: # Rows on screen are looked up by id right after
+            self.cache[str(app["id"])] = app
+        return page
+
+
+def open_repository(storage, data_file, background=False):
+    # Storage backends are interchangeable behind the repository interface
+    if storage == "sqlite":
+        return SqliteRepository(os.path.splitext(data_file)[0] + ".db", migrate_from=data_file)
+    return ApplicationRepository(JournalStore(data_file), DescriptionStore(data_file), background=background,
+                                 cache=SnapshotCache(data_file), history=StatusHistory(data_file),
+                                 lock=FileLock(data_file + ".lock"))
+
+
+# Bulk import/export. Rows are streamed one at a time in either format, CSV with a
+# header line or JSON Lines, chosen by the file extension.
+IMPORT_FIELDS = ("date", "company", "job", "description", "status")
+EXPORT_FIELDS = ("id",) + IMPORT_FIELDS
+MAX_IMPORT_MESSAGES = 100 # Rejected rows beyond this are only counted
+
+
+def is_csv(path):
+    return path.lower().endswith(".csv")
+
+
+def read_rows(path):
+    # (line number, row) pairs; row is None for a line that isn't valid JSON
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if is_csv(path):
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+def application_from_row(row):
+    # Same rules as the form: every field filled in, a DD/MM/YYYY date and a known status
+    if not isinstance(row, dict):
+        raise ValueError("not a JSON object")
+    values = [str(row.get(field) or "").strip() for field in IMPORT_FIELDS]
+    missing = [field for field, value in zip(IMPORT_FIELDS, values) if not value]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    date_str, company, job, description, status = values
+    if status not in STATUS_CODES:
+        raise ValueError(f"unknown status {status!r}")
+    try:
+        return build_application(date_str, company, job, description, status)
+    except ValueError:
+        raise ValueError(f"date {date_str!r} is not DD/MM/YYYY") from None
+
+
+def import_applications(repo, path, batch_size=ApplicationRepository.BATCH_SIZE):
+    # Generator that adds the valid rows of path with repo.add_many(), one batch at a
+    # time, so memory stays bounded by the batch size. After each batch it yields
+    # (imported, rejected, messages), messages being "line N: reason" for the first
+    # MAX_IMPORT_MESSAGES rejected rows.
+    imported = rejected = 0
+    messages = []
+    batch = []
+    for line_number, row in read_rows(path):
+        try:
+            batch.append(application_from_row(row))
+        except ValueError as e:
+            rejected += 1
+            if len(messages) < MAX_IMPORT_MESSAGES:
+                messages.append(f"line {line_number}: {e}")
+        if len(batch) >= batch_size:
+            imported += len(repo.add_many(batch))
+            batch = []
+            yield imported, rejected, messages
+    if batch:
+        imported += len(repo.add_many(batch))
+    if imported:
+        repo.save() # One snapshot (or WAL checkpoint) for the whole import
+    yield imported, rejected, messages
+
+
+def export_applications(repo, path, batch_size=ApplicationRepository.BATCH_SIZE):
+    # Generator that writes every application, oldest first, with its description,
+    # yielding the number written so far every batch_size rows and once at the end
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f) if is_csv(path) else None
+        if writer is not None:
+            writer.writerow(EXPORT_FIELDS)
+        for app in repo.iter_query("", "Old to New"): # Streams; SQLite reads it page by page
+            row = {field: app.get(field, "") for field in EXPORT_FIELDS}
+            row["description"] = repo.description(app)
+            if writer is not None:
+                writer.writerow(row.values())
+            else:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+            if count % batch_size == 0:
+                yield count
+    yield count
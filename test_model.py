@@ -0,0 +1,553 @@
+# Headless tests for model.py; every test works on files in its own temporary directory.
+# Run with: python -m pytest -q (or python -m unittest)
+import json
+import marshal
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from model import (INDEX_KEYS, SORT_OPTIONS, Application, ApplicationRepository, DescriptionStore, JournalStore,
+                   Metrics, PagedResult, SnapshotCache, SortedIndex, StatusHistory, application_from_row, build_application,
+                   import_applications, open_repository, parse_date_range)
+
+
+def application(company="Acme", status="pending", date_str="01/02/2024", **fields):
+    record = {"date": date_str, "company": company, "job": "Engineer", "description": f"{company} job",
+              "status": status}
+    record.update(fields)
+    return record
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_file = os.path.join(self.tmp.name, "applications.json")
+
+    def open_repo(self, storage="json"):
+        # With the lock, the cache and the history, as the GUI opens it
+        repo = open_repository(storage, self.data_file)
+        self.addCleanup(repo.close)
+        repo.load()
+        return repo
+
+    def open_uncached(self):
+        # Without the snapshot cache, so loading always replays the journal
+        repo = ApplicationRepository(JournalStore(self.data_file), DescriptionStore(self.data_file))
+        self.addCleanup(repo.close)
+        repo.load()
+        return repo
+
+    def write_snapshot(self, records):
+        with open(self.data_file, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+
+    def journal_path(self):
+        return self.data_file + ".journal"
+
+
+class JournalReplayTest(TempDirTestCase):
+    def snapshot_records(self):
+        return [{"id": 1, "date": "01/01/2024", "company": "Acme", "job": "Dev", "status": "pending",
+                 "timestamp": 1704067200.0},
+                {"id": 2, "date": "02/01/2024", "company": "Globex", "job": "QA", "status": "pending",
+                 "timestamp": 1704153600.0}]
+
+    def test_journal_is_applied_over_the_snapshot(self):
+        self.write_snapshot(self.snapshot_records())
+        store = JournalStore(self.data_file)
+        store.write_lines([
+            store.put_line({"id": 2, "date": "02/01/2024", "company": "Globex", "job": "QA", "status": "interview",
+                            "timestamp": 1704153600.0}),
+            store.put_line({"id": 3, "date": "03/01/2024", "company": "Initech", "job": "Ops", "status": "pending",
+                            "timestamp": 1704240000.0}),
+            store.delete_line([1]),
+        ])
+        repo = self.open_uncached()
+        self.assertEqual(sorted(app["id"] for app in repo.records), [2, 3])
+        self.assertEqual(repo.get(2)["status"], "interview")
+        self.assertEqual(repo.get(3)["company"], "Initech")
+        self.assertEqual(repo.next_id, 4)
+
+    def test_torn_last_line_is_truncated(self):
+        self.write_snapshot(self.snapshot_records())
+        store = JournalStore(self.data_file)
+        store.write_lines([store.delete_line([1])])
+        good_size = os.path.getsize(self.journal_path())
+        with open(self.journal_path(), "ab") as f:
+            f.write(b'{"op":"put","record":{"id":9,"comp') # Crash in the middle of a write
+        repo = self.open_uncached()
+        self.assertEqual([app["id"] for app in repo.records], [2])
+        self.assertEqual(os.path.getsize(self.journal_path()), good_size)
+        self.assertEqual(repo.store.journal_size, good_size)
+        # Appends after the cut replay normally
+        repo.update(2, dict(repo.get(2).to_dict(), status="offer"))
+        self.assertEqual(self.open_uncached().get(2)["status"], "offer")
+
+    def test_line_without_newline_is_treated_as_torn(self):
+        self.write_snapshot(self.snapshot_records())
+        store = JournalStore(self.data_file)
+        with open(self.journal_path(), "wb") as f:
+            f.write(store.delete_line([1]).rstrip(b"\n"))
+        repo = self.open_uncached()
+        self.assertEqual(sorted(app["id"] for app in repo.records), [1, 2])
+        self.assertEqual(os.path.getsize(self.journal_path()), 0)
+
+    def test_edits_survive_a_restart(self):
+        repo = self.open_uncached()
+        first = repo.add(application("Acme"))
+        second = repo.add(application("Globex"))
+        repo.update(first["id"], application("Acme", status="rejected"))
+        repo.remove([second["id"]])
+        self.assertTrue(os.path.exists(self.journal_path()))
+        reloaded = self.open_uncached()
+        self.assertEqual([app["id"] for app in reloaded.records], [first["id"]])
+        self.assertEqual(reloaded.get(first["id"])["status"], "rejected")
+        self.assertEqual(reloaded.description(reloaded.get(first["id"])), "Acme job")
+
+
+class CompactionTest(TempDirTestCase):
+    def test_threshold(self):
+        store = JournalStore(self.data_file)
+        store.snapshot_size = 10 * store.MIN_COMPACT_BYTES
+        store.journal_size = 5 * store.MIN_COMPACT_BYTES
+        self.assertFalse(store.needs_compaction()) # Up to half the snapshot
+        store.journal_size += 1
+        self.assertTrue(store.needs_compaction())
+        store.snapshot_size = 100
+        store.journal_size = store.MIN_COMPACT_BYTES
+        self.assertFalse(store.needs_compaction()) # Small journals are never compacted
+        store.journal_size += 1
+        self.assertTrue(store.needs_compaction())
+
+    def test_journal_is_folded_into_the_snapshot(self):
+        repo = self.open_uncached()
+        repo.store.MIN_COMPACT_BYTES = 2000
+        added = []
+        while os.path.exists(self.journal_path()) or not added:
+            added.append(repo.add(application(f"Company {len(added)}"))["id"])
+            self.assertLess(len(added), 100, "the journal was never compacted")
+        self.assertEqual(repo.store.journal_size, 0)
+        with open(self.data_file, encoding="utf-8") as f:
+            self.assertEqual(sorted(record["id"] for record in json.load(f)), added)
+        reloaded = self.open_uncached()
+        self.assertEqual(sorted(app["id"] for app in reloaded.records), added)
+        self.assertEqual(reloaded.description(reloaded.get(added[-1])), f"Company {len(added) - 1} job")
+
+
+class LegacyFileTest(TempDirTestCase):
+    def test_missing_and_repeated_ids_get_fresh_ones(self):
+        rows = [{"id": 1, "date": "01/01/2024", "company": "A", "job": "Dev", "status": "pending"},
+                {"date": "02/01/2024", "company": "B", "job": "Dev", "status": "pending"},
+                {"date": "03/01/2024", "company": "C", "job": "Dev", "status": "pending"},
+                {"id": 1, "date": "04/01/2024", "company": "D", "job": "Dev", "status": "pending"}]
+        self.write_snapshot(rows)
+        repo = self.open_repo()
+        by_company = {app["company"]: app["id"] for app in repo.records}
+        self.assertEqual(by_company, {"A": 1, "B": 2, "C": 3, "D": 4})
+        self.assertEqual(repo.next_id, 5)
+        repo.close()
+        with open(self.data_file, encoding="utf-8") as f: # Backfilled ids are saved right away
+            self.assertEqual(sorted(record["company"] for record in json.load(f)), ["A", "B", "C", "D"])
+
+    def test_file_without_ids_is_numbered_from_zero(self):
+        self.write_snapshot([{"date": "01/01/2024", "company": name, "job": "Dev", "status": "pending"}
+                             for name in "ABC"])
+        repo = self.open_repo()
+        self.assertEqual(sorted((app["id"], app["company"]) for app in repo.records), [(0, "A"), (1, "B"), (2, "C")])
+
+
+class SortedIndexTest(TempDirTestCase):
+    def test_entries_stay_sorted_with_ties_broken_by_id(self):
+        index = SortedIndex(INDEX_KEYS["company"])
+        index.build([{"id": 3, "company": "beta"}, {"id": 1, "company": "Alpha"}])
+        index.add({"id": 2, "company": "beta"})
+        index.add_many([{"id": 5, "company": "alpha"}, {"id": 4, "company": "Gamma"}])
+        self.assertEqual(list(index.ids()), [1, 5, 2, 3, 4]) # Casefolded, then by id
+        self.assertEqual(list(index.ids(reverse=True)), [4, 3, 2, 5, 1])
+        index.remove({"id": 2, "company": "beta"})
+        index.remove({"id": 9, "company": "beta"}) # Not indexed: nothing happens
+        self.assertEqual(list(index.ids()), [1, 5, 3, 4])
+
+    def test_key_range_is_half_open(self):
+        index = SortedIndex(INDEX_KEYS["timestamp"])
+        index.build([{"id": i, "timestamp": float(t)} for i, t in enumerate([10, 20, 20, 30, 40])])
+        self.assertEqual(list(index.ids(20.0, 40.0)), [1, 2, 3]) # low included, high excluded
+        self.assertEqual(list(index.ids(20.0, 40.0, reverse=True)), [3, 2, 1])
+        self.assertEqual(list(index.ids(None, 20.0)), [0])
+        self.assertEqual(list(index.ids(41.0)), [])
+
+    def test_date_range_bounds(self):
+        self.assertEqual(parse_date_range("01/02/2024", "03/02/2024"),
+                         (datetime(2024, 2, 1).timestamp(), datetime(2024, 2, 4).timestamp()))
+        self.assertEqual(parse_date_range("", " 03/02/2024 "), (None, datetime(2024, 2, 4).timestamp()))
+        self.assertEqual(parse_date_range("01/02", "31/02/2024"), (None, None)) # Incomplete or invalid
+
+    def test_queries_follow_every_sort_option_and_date_range(self):
+        repo = self.open_repo()
+        names = ["delta", "Alpha", "charlie", "bravo", "alpha", "Echo"]
+        for day, name in zip([31, 1, 2, 3, 4, 3], names):
+            month = 1 if day == 31 else 2
+            repo.add(build_application(f"{day:02d}/{month:02d}/2024", name, name[::-1], "",
+                                       ["offer", "pending", "rejected"][len(name) % 3]))
+        repo.add(dict(build_application("03/02/2024", "Zulu", "Dev", "", "pending"),
+                      timestamp=datetime(2024, 2, 3, 23, 59).timestamp())) # "To" includes its whole day
+        records = repo.records
+        date_from, date_to = parse_date_range("01/02/2024", "03/02/2024")
+        for option, (index_name, reverse) in SORT_OPTIONS.items():
+            with self.subTest(option=option):
+                expected = sorted(records, key=lambda app: (INDEX_KEYS[index_name](app), app["id"]), reverse=reverse)
+                self.assertEqual([app["id"] for app in repo.query("", option)], [app["id"] for app in expected])
+                in_range = [app["id"] for app in expected if date_from <= app["timestamp"] < date_to]
+                self.assertEqual([app["id"] for app in repo.query("", option, date_from, date_to)], in_range)
+        self.assertEqual(sorted(repo.get(app_id)["company"] for app_id in
+                                repo.sort_indexes["timestamp"].ids(date_from, date_to)),
+                         ["Alpha", "Echo", "Zulu", "bravo", "charlie"]) # Not 31/01 or 04/02
+
+
+class SqliteTest(TempDirTestCase):
+    DESCRIPTIONS = ["Python and Kubernetes", "Remote-first, \"quoted\" perks", "Go", "Ünïcode rocks", "py"]
+
+    def add_samples(self, repo, count):
+        return [repo.add(build_application(f"{day % 28 + 1:02d}/02/2024", f"Company {day}", f"Role {day % 5}",
+                                           self.DESCRIPTIONS[day % len(self.DESCRIPTIONS)],
+                                           ["pending", "interview", "offer"][day % 3]))["id"]
+                for day in range(count)]
+
+    def test_results_are_read_a_page_at_a_time(self):
+        repo = self.open_repo("sqlite")
+        ids = self.add_samples(repo, PagedResult.PAGE_SIZE * 2 + 50)
+        result = repo.query("", "Company A-Z")
+        result.MAX_PAGES = 2
+        self.assertEqual(len(result), len(ids))
+        self.assertEqual(result.pages, {}) # Nothing read until rows are shown
+        self.assertEqual(result[len(ids) - 1]["company"], "Company 99")
+        self.assertEqual(list(result.pages), [2])
+        expected = [app_id for _, app_id in sorted((f"company {i}", app_id) for i, app_id in enumerate(ids))]
+        self.assertEqual(list(result.ids), expected)
+        self.assertLessEqual(len(result.pages), 2) # The oldest page is dropped
+        with self.assertRaises(IndexError):
+            result[len(ids)]
+
+    def test_search_and_date_range_match_the_json_backend(self):
+        sqlite_repo = self.open_repo("sqlite")
+        self.add_samples(sqlite_repo, 40)
+        self.data_file = os.path.join(self.tmp.name, "other.json")
+        json_repo = self.open_repo()
+        self.add_samples(json_repo, 40)
+        ranges = [(None, None), parse_date_range("05/02/2024", "10/02/2024")]
+        for text in ["kubernetes", "py", "PY", "remote-first", '"quoted"', "ünï", "company 1", "role 3", "offer",
+                     "nowhere", "o"]:
+            for date_range in ranges:
+                with self.subTest(text=text, date_range=date_range):
+                    self.assertEqual([app["id"] for app in sqlite_repo.query(text, "New to Old", *date_range)],
+                                     [app["id"] for app in json_repo.query(text, "New to Old", *date_range)])
+
+    def test_json_data_file_is_migrated_once(self):
+        json_repo = self.open_repo()
+        first = json_repo.add(application("Acme", description="Build the thing"))
+        json_repo.add(application("Globex", timestamp=1706745600.0))
+        json_repo.update(first["id"], application("Acme", status="interview", description="Second round",
+                                                  timestamp=1706745600.0))
+        json_repo.close() # Journal, blob store and history as a JSON user leaves them
+        repo = self.open_repo("sqlite")
+        self.assertEqual(sorted((app["id"], app["company"], app["status"]) for app in repo.records),
+                         [(first["id"], "Acme", "interview"), (first["id"] + 1, "Globex", "pending")])
+        self.assertEqual(repo.description(repo.get(first["id"])), "Second round")
+        self.assertEqual(repo.statistics().reached, {"pending": 2, "interview": 1})
+        repo.remove([first["id"]])
+        repo.close()
+        repo = self.open_repo("sqlite") # Already migrated: the JSON file is not read again
+        self.assertEqual([app["company"] for app in repo.records], ["Globex"])
+        self.assertEqual(repo.add(application("Initech", timestamp=1706745600.0))["id"], first["id"] + 2)
+
+
+class ApplicationTest(unittest.TestCase):
+    RECORDS = [
+        {"id": 1, "date": "01/02/2024", "company": "Acme", "job": "Dev", "status": "offer",
+         "timestamp": 1706745600.0, "description_ref": [1, 1234, 56, 1]},
+        {"id": "legacy-7", "date": "01/02/2024", "company": "Acme", "job": "Dev", "status": "pending"},
+        {"id": 3, "company": 42, "status": "unheard-of", "timestamp": 5, "notes": ["a", {"b": None}]},
+        {"id": 4, "date": "01/02/2024", "description": "Still inline", "job": ""},
+        {},
+    ]
+
+    def test_to_dict_round_trip(self):
+        for record in self.RECORDS:
+            with self.subTest(record=record):
+                app = Application.from_dict(record)
+                self.assertEqual(app.to_dict(), record)
+                self.assertEqual(json.loads(json.dumps(app, default=Application.to_dict)), record)
+                self.assertEqual(Application(*app.slot_values()).to_dict(), record)
+                self.assertEqual(app.copy().to_dict(), record)
+
+    def test_reads_and_writes_like_a_dict(self):
+        app = Application.from_dict(self.RECORDS[0])
+        self.assertEqual(app["status"], "offer")
+        self.assertEqual(app.get("notes", "none"), "none")
+        app["status"] = "withdrawn"
+        app["notes"] = "called back"
+        del app["description_ref"]
+        self.assertNotIn("description_ref", app)
+        self.assertEqual(app.pop("notes"), "called back")
+        self.assertEqual(app.to_dict(), {"id": 1, "date": "01/02/2024", "company": "Acme", "job": "Dev",
+                                         "status": "withdrawn", "timestamp": 1706745600.0})
+
+
+class SnapshotCacheTest(TempDirTestCase):
+    def test_round_trip_and_staleness(self):
+        repo = self.open_repo()
+        for company in ("Acme", "Globex"):
+            repo.add(application(company))
+        repo.save() # The cache is keyed on the snapshot, so there has to be one
+        repo.add(application("Initech"))
+        repo.close()
+        cache = SnapshotCache(self.data_file)
+        state = cache.load()
+        self.assertIsNotNone(state)
+        self.assertEqual([app.to_dict() for app in state["records"]], [app.to_dict() for app in repo.records])
+        with open(self.journal_path(), "ab") as f:
+            f.write(b"\n") # Any change to the data files invalidates it
+        self.assertIsNone(cache.load())
+
+    def test_damaged_or_foreign_cache_is_ignored(self):
+        repo = self.open_repo()
+        repo.add(application())
+        repo.save()
+        repo.close()
+        cache = SnapshotCache(self.data_file)
+        with open(cache.path, "rb") as f:
+            data = f.read()
+        for damaged in (data[:len(data) // 2], cache.MAGIC + marshal.dumps((cache.key(), [(1, 2)], {})),
+                        cache.MAGIC + marshal.dumps({"key": cache.key()})):
+            with open(cache.path, "wb") as f:
+                f.write(damaged)
+            self.assertIsNone(cache.load())
+        self.assertEqual(len(self.open_repo().records), 1)
+
+
+class ImportTest(TempDirTestCase):
+    def test_row_validation(self):
+        self.assertEqual(application_from_row(application(" Acme ", description="x"))["company"], "Acme")
+        for row, reason in [
+            (None, "not a JSON object"),
+            (["01/02/2024", "Acme"], "not a JSON object"),
+            (application(company=""), "missing company"),
+            ({"date": "01/02/2024"}, "missing company, job, description, status"),
+            (application(status="ghosted"), "unknown status 'ghosted'"),
+            (application(date_str="2024-02-01"), "date '2024-02-01' is not DD/MM/YYYY"),
+            (application(date_str="31/02/2024"), "date '31/02/2024' is not DD/MM/YYYY"),
+        ]:
+            with self.subTest(row=row):
+                with self.assertRaises(ValueError) as caught:
+                    application_from_row(row)
+                self.assertEqual(str(caught.exception), reason)
+
+    def test_import_counts_and_reports_bad_rows(self):
+        path = os.path.join(self.tmp.name, "import.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write("date,company,job,description,status\n"
+                    "01/02/2024,Acme,Dev,Build things,pending\n"
+                    "2024-02-02,Globex,QA,Test things,pending\n"
+                    "03/02/2024,Initech,Ops,\"Run things,\nat night\",offer\n"
+                    "04/02/2024,Umbrella,Dev,Research,maybe\n")
+        repo = self.open_repo()
+        imported, rejected, messages = list(import_applications(repo, path, batch_size=1))[-1]
+        self.assertEqual((imported, rejected), (2, 2))
+        self.assertEqual(messages, ["line 3: date '2024-02-02' is not DD/MM/YYYY",
+                                    "line 6: unknown status 'maybe'"])
+        self.assertEqual(sorted(app["company"] for app in repo.records), ["Acme", "Initech"])
+        initech = next(app for app in repo.records if app["company"] == "Initech")
+        self.assertEqual(repo.description(initech), "Run things,\nat night")
+
+    def test_json_lines_import_skips_invalid_json(self):
+        path = os.path.join(self.tmp.name, "import.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(application("Acme")) + "\n\n{not json\n" + json.dumps(application("Globex")) + "\n")
+        repo = self.open_repo()
+        imported, rejected, messages = list(import_applications(repo, path))[-1]
+        self.assertEqual((imported, rejected, messages), (2, 1, ["line 3: not a JSON object"]))
+
+
+class ExternalChangesTest(TempDirTestCase):
+    def test_two_repositories_on_one_file(self):
+        first, second = self.open_repo(), self.open_repo()
+        self.assertFalse(second.check_external_changes())
+
+        added = first.add(application("Acme"))
+        self.assertTrue(second.check_external_changes())
+        self.assertEqual(second.take_external_changes(), {str(added["id"]): None})
+        self.assertEqual(second.description(second.get(added["id"])), "Acme job")
+
+        second.update(added["id"], application("Acme", status="interview", description="Second round"))
+        self.assertTrue(first.check_external_changes())
+        before = first.take_external_changes()[str(added["id"])]
+        self.assertEqual(before["status"], "pending")
+        self.assertEqual(first.get(added["id"])["status"], "interview")
+        self.assertEqual(first.description(first.get(added["id"])), "Second round")
+
+        # Ids come from the file as it is now, so both sides never hand out the same one
+        other = second.add(application("Globex"))
+        mine = first.add(application("Initech"))
+        self.assertNotEqual(mine["id"], other["id"])
+        self.assertEqual(first.get(other["id"])["company"], "Globex")
+        self.assertTrue(second.check_external_changes())
+        self.assertEqual(second.get(mine["id"])["company"], "Initech")
+
+    def test_merge_after_the_other_side_compacts(self):
+        first, second = self.open_repo(), self.open_repo()
+        kept = first.add(application("Acme"))
+        dropped = first.add(application("Globex"))
+        first.remove([dropped["id"]])
+        first.save() # New snapshot, journal gone
+        self.assertFalse(os.path.exists(self.journal_path()))
+        self.assertTrue(second.check_external_changes())
+        self.assertEqual([app["id"] for app in second.records], [kept["id"]])
+        self.assertEqual(second.take_external_changes(), {str(kept["id"]): None})
+        self.assertFalse(second.check_external_changes())
+
+    def test_statistics_are_rebuilt_after_a_merge(self):
+        for storage in ("json", "sqlite"):
+            with self.subTest(storage=storage):
+                self.data_file = os.path.join(self.tmp.name, f"{storage}.json")
+                first, second = self.open_repo(storage), self.open_repo(storage)
+                self.assertEqual(second.statistics().status_counts, {}) # Built before the others' changes
+                first.add(application("Acme"))
+                self.assertTrue(second.check_external_changes())
+                self.assertEqual(second.statistics().status_counts, {"pending": 1})
+                first.add(application("Globex"))
+                first.add(application("Initech"))
+                self.assertTrue(second.check_external_changes())
+                stats = second.statistics()
+                self.assertEqual(stats.status_counts, {"pending": 3})
+                self.assertEqual(stats.reached["pending"], 3)
+
+
+class SearchIndexTest(TempDirTestCase):
+    def test_background_build_matches_a_scan(self):
+        repo = self.open_repo()
+        ids = [app["id"] for app in repo.add_many([application(f"Company {i}", job=f"role{i % 7}")
+                                                    for i in range(60)])]
+        scanned = {text: [app["id"] for app in repo.iter_query(text)] for text in ("company 1", "role3", "job")}
+        steps = repo.build_search_index(batch_size=10)
+        next(steps)
+        repo.update(ids[50], application("Renamed", job="role3"))
+        repo.remove([ids[51]])
+        repo.add(application("Company 100", job="role3"))
+        for _ in steps:
+            pass
+        self.assertTrue(repo.search_index_ready)
+        indexed = {text: [app["id"] for app in repo.iter_query(text)] for text in scanned}
+        repo.search_index_ready = False
+        self.assertEqual(indexed, {text: [app["id"] for app in repo.iter_query(text)] for text in scanned})
+        self.assertNotIn(ids[51], indexed["role3"])
+
+    def test_one_word_queries_read_no_descriptions(self):
+        repo = self.open_repo()
+        repo.add_many([application(f"Company {i}", date_str=f"{i % 28 + 1:02d}/02/2024",
+                                   description=f"Python and kubernetes #{i}" if i % 3 else "Go")
+                       for i in range(40)])
+        [*repo.build_search_index()]
+        reads = []
+        description = repo.description
+        repo.description = lambda app: reads.append(app["id"]) or description(app)
+        date_from, date_to = parse_date_range("05/02/2024", "20/02/2024")
+        queries = [("kubernetes", None, None), ("py", None, None), ("company", None, None),
+                   ("kubernetes", date_from, date_to), ("python", date_from, date_to)]
+        results = {}
+        for text, low, high in queries:
+            results[text, low] = [app["id"] for app in repo.iter_query(text, "Company A-Z", low, high)]
+        self.assertEqual(reads, [])
+        repo.search_index_ready = False
+        for text, low, high in queries:
+            with self.subTest(text=text, ranged=low is not None):
+                self.assertEqual(results[text, low],
+                                 [app["id"] for app in repo.iter_query(text, "Company A-Z", low, high)])
+
+
+class StatusHistoryTest(TempDirTestCase):
+    def test_reused_id_starts_a_fresh_history(self):
+        repo = self.open_repo()
+        repo.add(application("Acme"))
+        app = repo.add(application("Globex"))
+        for status in ("interview", "offer"):
+            repo.update(app["id"], application("Globex", status=status))
+        repo.remove([app["id"]])
+        repo.close()
+        repo = self.open_repo()
+        self.assertEqual(repo.add(application("Initech"))["id"], app["id"]) # next_id restarts
+        self.assertEqual(StatusHistory(self.data_file).read(), [])
+        stats = repo.statistics()
+        self.assertEqual({status: count for status, count in stats.reached.items() if count}, {"pending": 2})
+
+
+class StatisticsTest(TempDirTestCase):
+    def counters(self, stats):
+        # Everything but the timing sums, which only have to agree to rounding
+        return {name: getattr(stats, name) for name in ("status_counts", "weeks", "months", "companies",
+                                                        "in_stage", "visited", "reached")}
+
+    def rebuilt(self):
+        # What a fresh start computes from the files
+        repo = self.open_repo()
+        return self.counters(repo.statistics())
+
+    def test_counters_follow_edits_and_removes(self):
+        repo = self.open_repo()
+        stats = repo.statistics() # Built now, then kept current by each change
+        ids = [repo.add(build_application(f"{day:02d}/02/2024", company, "Dev", "", "pending"))["id"]
+               for day, company in enumerate(["Acme", "acme", "Globex", "Initech"], 1)]
+        repo.update(ids[0], build_application("01/02/2024", "Acme", "Dev", "", "interview"))
+        repo.update(ids[0], build_application("01/02/2024", "Acme", "Dev", "", "offer"))
+        repo.update(ids[2], build_application("20/03/2024", "Globex Corp", "Dev", "", "rejected"))
+        repo.update(ids[3], build_application("04/02/2024", "Initech", "Dev", "", "pending")) # Status unchanged
+        repo.remove([ids[1]])
+        self.assertIs(repo.statistics(), stats)
+        self.assertEqual(stats.status_counts, {"pending": 1, "offer": 1, "rejected": 1})
+        self.assertEqual(stats.reached, {**dict.fromkeys(stats.reached, 0), "pending": 3, "interview": 1,
+                                         "offer": 1, "rejected": 1})
+        self.assertEqual(stats.companies["acme"][1:], [1, 1]) # The removed "acme" no longer counts
+        self.assertEqual(stats.months, {"2024-02": 2, "2024-03": 1})
+        self.assertEqual(stats.stage_time["pending"][1], 2) # Completed pending stays
+        repo.close()
+        self.assertEqual(self.counters(stats), self.rebuilt())
+
+    def test_counters_follow_merged_changes(self):
+        first, second = self.open_repo(), self.open_repo()
+        app = first.add(build_application("01/02/2024", "Acme", "Dev", "", "pending"))
+        other = first.add(build_application("02/02/2024", "Globex", "Dev", "", "pending"))
+        second.check_external_changes()
+        second.statistics()
+        first.update(app["id"], build_application("01/02/2024", "Acme", "Dev", "", "interview"))
+        first.remove([other["id"]])
+        first.add(build_application("03/02/2024", "Initech", "Dev", "", "pending"))
+        self.assertTrue(second.check_external_changes())
+        merged = self.counters(second.statistics())
+        self.assertEqual(merged["status_counts"], {"pending": 1, "interview": 1})
+        self.assertEqual(merged, self.counters(first.statistics()))
+        first.close()
+        self.assertEqual(merged, self.rebuilt())
+
+
+
+class MetricsTest(unittest.TestCase):
+    def test_lookups_stay_out_of_the_overlay(self):
+        class Repo:
+            def query(self, text):
+                return [text]
+
+            def get(self, app_id):
+                return app_id
+        metrics, repo = Metrics(enabled=True), Repo()
+        metrics.wrap(repo, ["query"], prefix="repo.")
+        metrics.wrap(repo, ["get"], prefix="repo.", overlay=False)
+        with metrics.measure("filter") as measurement:
+            measurement.rows = len(repo.query("acme"))
+        repo.get(1)
+        metrics.record("writer.handler", 0.5, overlay=False)
+        self.assertEqual(metrics.last[0::2], ("filter", 1))
+        self.assertEqual(metrics.counts, {"repo.query": 1, "filter": 1, "repo.get": 1, "writer.handler": 1})
+
+if __name__ == "__main__":
+    unittest.main()